@@ -1,3 +1,4 @@
+from argparse import ArgumentParser
 from signal import SIGTERM, signal
 import sys
 
@@ -5,7 +6,12 @@ from engine.gameengine import GameEngine
 
 
 if __name__ == "__main__":
-    engine = GameEngine()
+    parser = ArgumentParser(prog = "engine")
+    parser.add_argument("--seed", type = int, default = None, help = "seed for the game's random number generator")
+    parser.add_argument("--battle-workers", type = int, default = 0, help = "number of processes to fight each round's battles in (0 fights them in the engine process)")
+    args = parser.parse_args()
+
+    engine = GameEngine(args.seed, args.battle_workers)
 
     def kill_handler(a, b):
         print("Game engine killed")
@@ -0,0 +1,229 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+import os
+from select import select
+import sys
+from typing import IO, TYPE_CHECKING, Dict, List, Optional
+
+from engine.sim.battlecache import DEFAULT_MAX_SIZE, BattleCache
+from engine.sim.exactsolver import ExactSolver
+from engine.sim.simulator import Simulator, simulate
+from engine.sim.winrateestimator import WinRateEstimator
+
+if TYPE_CHECKING:
+    from engine.sim.simulationresult import SimulationResult
+
+# Most requests read from the input at once
+MAX_BATCH_SIZE = 256
+
+# Most bytes read from the input at once
+READ_CHUNK_SIZE = 65536
+
+# The exact solver forgets its solved states once it holds this many
+MAX_SOLVER_STATES = 1_000_000
+
+DEFAULT_N = 1000
+
+
+# Answers battle queries, one JSON object per line, for as long as its input is open.
+# Every request has "lineup_a" and "lineup_b" in the LineupPet.from_dict format, and
+# optionally "id", which is copied to the response, and "mode":
+#   - "simulate" (default): battles n times (default 1000) with "seed" and "round", and
+#     returns the wins, losses and ties for lineup A. Results are cached between requests
+#   - "solve": returns the exact win, tie and loss probabilities
+#   - "estimate": battles until the win rate is known within "max_width"
+# Requests that fail get an "error" instead. Lines that are already waiting are handled
+# as one batch, and the simulations the cache can't answer are split across the workers
+class BattleServer:
+    def __init__(self, input: IO[str], output: IO[str], num_workers: int = 0, cache_size: int = DEFAULT_MAX_SIZE):
+        self.input = input
+        self.output = output
+        self.cache = BattleCache(cache_size)
+        self.solver = ExactSolver()
+        self.num_workers = num_workers
+        self.executor = ProcessPoolExecutor(num_workers) if num_workers > 0 else None
+
+        # Inputs with a file descriptor are read in chunks and split into lines here, so
+        # select sees every line that hasn't been read yet. Python's own buffering would
+        # hide lines that were read into its buffer from select
+        self._input_fd = self._get_input_fd()
+        self._pending_input = bytearray()
+        self._input_closed = False
+
+    def run(self):
+        while True:
+            batch = self._read_batch()
+            if batch is None: break
+
+            for response in self.handle_batch(batch):
+                self.output.write(json.dumps(response) + "\n")
+            self.output.flush()
+
+        self.shutdown()
+
+    def handle_batch(self, lines: List[str]) -> List[dict]:
+        requests = []
+        for line in lines:
+            try:
+                request = json.loads(line)
+            except ValueError as exception:
+                request = {"error": f"Invalid JSON: {exception}"}
+
+            if not isinstance(request, dict):
+                request = {"error": "A request must be a JSON object"}
+            requests.append(request)
+
+        top_ups = self._simulate_on_workers(requests) if self.executor is not None else {}
+
+        responses = []
+        for i, request in enumerate(requests):
+            if i in top_ups:
+                self.cache.add(*top_ups[i])
+            responses.append(self.handle_request(request))
+        return responses
+
+    def handle_request(self, request: dict) -> dict:
+        response = {"id": request.get("id")}
+        if "error" in request:
+            response["error"] = request["error"]
+            return response
+
+        try:
+            mode = request.get("mode", "simulate")
+            if mode == "simulate":
+                response.update(self._simulate(request).get_view())
+            elif mode == "solve":
+                if len(self.solver) > MAX_SOLVER_STATES:
+                    self.solver.clear()
+                response.update(self.solver.solve(request["lineup_a"], request["lineup_b"]).get_view())
+            elif mode == "estimate":
+                estimator = WinRateEstimator(max_width = request.get("max_width", 0.02))
+                response.update(estimator.estimate(request["lineup_a"], request["lineup_b"], request.get("seed")).get_view())
+            else:
+                response["error"] = f"Unknown mode {mode}"
+        except Exception as exception:
+            # A lineup that breaks the battle only fails its own request
+            response["error"] = f"{type(exception).__name__}: {exception}"
+
+        return response
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def _simulate(self, request: dict) -> 'SimulationResult':
+        return self.cache.simulate(request["lineup_a"], request["lineup_b"], request.get("n", DEFAULT_N), request.get("seed"), request.get("round", 0))
+
+    # Runs the batch's uncached simulations on the workers. Each matchup is topped up in the
+    # order of its requests, with the same seeds as BattleCache.simulate, and every top up is
+    # returned by the index of its request, to be added to the cache just before that request
+    # is handled. The responses are then the same as without workers. Requests whose
+    # simulation fails get the error instead
+    def _simulate_on_workers(self, requests: List[dict]) -> Dict[int, tuple]:
+        jobs: Dict[tuple, List[tuple]] = {}
+        job_requests: Dict[tuple, List[int]] = {}
+        num_planned: Dict[tuple, int] = {}
+        for i, request in enumerate(requests):
+            if request.get("mode", "simulate") != "simulate" or "error" in request: continue
+
+            try:
+                pets_a = Simulator.parse_lineup(request["lineup_a"])
+                pets_b = Simulator.parse_lineup(request["lineup_b"])
+                num_samples = BattleCache.get_num_samples(pets_a, pets_b, request.get("n", DEFAULT_N))
+                round = request.get("round", 0)
+                key = BattleCache.get_key(pets_a, pets_b, round)
+                num_cached = num_planned[key] if key in num_planned else self.cache.get_num_cached(pets_a, pets_b, round)
+                if num_samples <= num_cached: continue
+            except (AttributeError, KeyError, TypeError, ValueError):
+                # The error is reported when the request is handled
+                continue
+
+            seed = BattleCache.get_sample_seed(request.get("seed"), num_cached)
+            jobs.setdefault(key, []).append((pets_a, pets_b, num_samples - num_cached, seed, round))
+            job_requests.setdefault(key, []).append(i)
+            num_planned[key] = num_samples
+
+        futures = {key: [self.executor.submit(simulate, pets_a, pets_b, n, seed) for pets_a, pets_b, n, seed, _ in key_jobs] for key, key_jobs in jobs.items()}
+        top_ups: Dict[int, tuple] = {}
+        is_broken = False
+        for key, key_futures in futures.items():
+            try:
+                results = [future.result() for future in key_futures]
+            except Exception as exception:
+                # Later top ups of the matchup would leave a gap, so none of them are used
+                is_broken = is_broken or isinstance(exception, BrokenProcessPool)
+                for i in job_requests[key]:
+                    requests[i]["error"] = f"{type(exception).__name__}: {exception}"
+                continue
+
+            for i, (pets_a, pets_b, _, _, round), result in zip(job_requests[key], jobs[key], results):
+                top_ups[i] = (pets_a, pets_b, result, round)
+
+        # A worker that died takes the pool down with it, so later batches get a new one
+        if is_broken:
+            self.executor.shutdown()
+            self.executor = ProcessPoolExecutor(self.num_workers)
+
+        return top_ups
+
+    def _read_batch(self) -> Optional[List[str]]:
+        if self._input_fd is None:
+            return self._read_batch_from_lines()
+
+        batch = self._take_pending_lines(MAX_BATCH_SIZE)
+        while len(batch) < MAX_BATCH_SIZE and not self._input_closed and (len(batch) == 0 or self._has_waiting_input()):
+            data = os.read(self._input_fd, READ_CHUNK_SIZE)
+            if data == b"":
+                # The last line doesn't need a newline
+                self._input_closed = True
+                self._pending_input += b"\n"
+            else:
+                self._pending_input += data
+            batch += self._take_pending_lines(MAX_BATCH_SIZE - len(batch))
+
+        return batch if len(batch) > 0 else None
+
+    # Takes up to max_lines complete lines out of the pending input, skipping blank ones
+    def _take_pending_lines(self, max_lines: int) -> List[str]:
+        lines = []
+        while len(lines) < max_lines:
+            end = self._pending_input.find(b"\n")
+            if end == -1: break
+
+            # Invalid UTF-8 only breaks the JSON of its own line
+            line = self._pending_input[:end].decode(errors = "replace")
+            del self._pending_input[:end + 1]
+            if line.strip() != "":
+                lines.append(line)
+        return lines
+
+    def _has_waiting_input(self) -> bool:
+        return len(select([self._input_fd], [], [], 0)[0]) > 0
+
+    # For inputs that aren't files (ex: StringIO), which never block
+    def _read_batch_from_lines(self) -> Optional[List[str]]:
+        batch = []
+        while len(batch) < MAX_BATCH_SIZE:
+            line = self.input.readline()
+            if line == "": break
+            if line.strip() != "":
+                batch.append(line)
+
+        return batch if len(batch) > 0 else None
+
+    def _get_input_fd(self) -> Optional[int]:
+        try:
+            return self.input.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog = "engine.battleserver")
+    parser.add_argument("--workers", type = int, default = 0, help = "number of processes to run simulations in (0 runs them in the server process)")
+    parser.add_argument("--cache-size", type = int, default = DEFAULT_MAX_SIZE, help = "number of matchups to keep in the battle cache")
+    args = parser.parse_args()
+
+    BattleServer(sys.stdin, sys.stdout, args.workers, args.cache_size).run()
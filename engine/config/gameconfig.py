@@ -9,3 +9,4 @@ LEVEL_3_CUTOFF = 5
 PET_BUY_COST = 3
 MAX_SHOP_TIER = 4
 MAX_ROUNDS = 150
+MAX_BATTLE_TURNS = 500
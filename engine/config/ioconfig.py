@@ -1,6 +1,7 @@
 import os
 
 CORE_DIRECTORY = os.environ["GAME_ENGINE_CORE_DIRECTORY"] if "GAME_ENGINE_CORE_DIRECTORY" in os.environ else "."
+# Timeouts can be fractions of a second
 OPEN_PIPE_TIMEOUT_SECONDS = 1
 WRITE_PIPE_TIMEOUT_SECONDS = 1
 READ_PIPE_TIMEOUT_SECONDS = 1
@@ -48,3 +48,14 @@ class AbilityType(Enum):
 
     # On-demand; triggers when the buy round ends
     BUY_ROUND_END = 14
+
+# Ability types that never fire during a battle. None is for pets without an ability
+BUY_STAGE_ABILITY_TYPES = [
+    None,
+    AbilityType.BUY,
+    AbilityType.SELL,
+    AbilityType.LEVEL_UP,
+    AbilityType.BUY_ROUND_START,
+    AbilityType.FRIEND_ATE_FOOD,
+    AbilityType.BUY_ROUND_END,
+]
@@ -1,87 +1,219 @@
-from copy import copy
 from typing import TYPE_CHECKING, List, Optional
 
 from engine.config.foodconfig import FOOD_CONFIG
 from engine.config.foodtype import FoodType
+from engine.config.gameconfig import MAX_BATTLE_TURNS
 from engine.config.roundconfig import RoundConfig
-from engine.game.abilitytype import AbilityType
+from engine.game.abilitytype import BUY_STAGE_ABILITY_TYPES, AbilityType
+from engine.game.battleeventtype import BattleEventType
 
 if TYPE_CHECKING:
+    from engine.game.battlepet import BattlePet
+    from engine.game.battlerecorder import BattleRecorder
+    from engine.game.battlestats import BattleStats
     from engine.output.gamelog import GameLog
+    from engine.state.battleplayerstate import BattlePlayerState
     from engine.state.gamestate import GameState
-    from engine.state.petstate import PetState
-    from engine.state.playerstate import PlayerState
 
 
 class Battle:
-    def __init__(self, player: 'PlayerState', challenger: 'PlayerState', state: 'GameState', log: 'GameLog'):
+    def __init__(self, player: 'BattlePlayerState', challenger: 'BattlePlayerState', state: 'GameState', log: Optional['GameLog'], recorder: Optional['BattleRecorder'] = None, stats: Optional['BattleStats'] = None):
         self.player = player
         self.challenger = challenger
         self.state = state
         self.log = log
 
-        self.hurt_and_faint_and_bee: List['PetState'] = []
-        self.knockout: Optional['PetState'] = None
+        # Records the events of the battle when set
+        self.recorder = recorder
 
-    def run(self) -> bool:
-        self.start_battle()
+        # Counts what happens in the battle when set. Can't be used together with a recorder
+        self.stats = stats
 
-        while len(self.player.battle_pets) > 0 and len(self.challenger.battle_pets) > 0:
-            self.run_attack_turn()
+        # Battles still running after this many attack turns are ties
+        self.max_turns = MAX_BATTLE_TURNS
+
+        # Pets in here are flagged with is_queued, so each pet is only added once
+        self.hurt_and_faint_and_bee: List['BattlePet'] = []
+        self.knockout: Optional['BattlePet'] = None
 
-        player_lost = self._determine_winner()
+        # Whether battle_pets may contain fainted pets that need to be cleaned up
+        self.has_fainted_pets = False
+
+    def run(self) -> Optional[bool]:
+        player_lost = self.fight()
+        self.end_battle(player_lost)
+        return player_lost
+
+    # Applies the outcome of the fight to the player's health and the game log
+    def end_battle(self, player_lost: Optional[bool]):
         round_config = RoundConfig.get_round_config(self.state.round)
         if player_lost:
             self.player.health -= round_config.HEALTH_LOST
 
         self.log.write_battle_stage_log(self.player, self.challenger, player_lost, round_config.HEALTH_LOST)
 
+    # Runs the battle without touching player health or the game log
+    # Returns whether the player lost (None on a tie)
+    def fight(self) -> Optional[bool]:
+        self.start_battle()
+
+        player_lost = self._run_attack_turns()
+        if self.recorder is not None:
+            self.recorder.record_end(player_lost)
+        if self.stats is not None:
+            self.stats.end_battle()
+        return player_lost
+
     def start_battle(self):
         # Set opponent + create copy of pets (player.battle_pets)
         self.player.start_battle(self.challenger)
         self.challenger.start_battle(self.player)
+        if self.recorder is not None:
+            if self.stats is not None:
+                raise ValueError("A battle can't have both a recorder and stats")
+            self.recorder.start_battle(self)
+        if self.stats is not None:
+            self.stats.start_battle(self)
+        self.hurt_and_faint_and_bee = []
+        self.has_fainted_pets = True
         self._cleanup_battle_pets()
 
-        self._proc_battle_round_start()
+        if self._has_ability_type(AbilityType.BATTLE_ROUND_START):
+            self._proc_battle_round_start()
         self._proc_hurt_and_faint()
 
         self._cleanup_battle_pets()
 
     def run_attack_turn(self):
-        self.hurt_and_faint_and_bee = []
         self.knockout = None
+        if self.recorder is not None:
+            self.recorder.record_turn()
 
         player_front = self.player.battle_pets[0]
         challenger_front = self.challenger.battle_pets[0]
 
-        self._proc_before_attack(player_front, challenger_front)
+        # Phases are skipped when neither lineup has a pet with that ability
+        if self._has_ability_type(AbilityType.BEFORE_ATTACK):
+            self._proc_before_attack(player_front, challenger_front)
 
         player_front.damage_enemy_with_attack(challenger_front)
         challenger_front.damage_enemy_with_attack(player_front)
-        self._add_to_knockout(player_front, challenger_front)
-
-        self._proc_after_attack(player_front, challenger_front)
-        self._proc_friend_ahead_attacked()
-        self._proc_knockout()
+        has_knockout = self._has_ability_type(AbilityType.KNOCKOUT)
+        if has_knockout:
+            self._add_to_knockout(player_front, challenger_front)
+
+        if self._has_ability_type(AbilityType.AFTER_ATTACK):
+            self._proc_after_attack(player_front, challenger_front)
+        if self._has_ability_type(AbilityType.FRIEND_AHEAD_ATTACK):
+            self._proc_friend_ahead_attacked()
+        if has_knockout:
+            self._proc_knockout()
         self._proc_hurt_and_faint()
 
         self._cleanup_battle_pets()
 
-    def add_hurt_or_fainted_or_bee(self, pet: 'PetState'):
-        if pet not in self.hurt_and_faint_and_bee:
+    # Battles that stop making progress or reach max_turns end in a tie
+    def _run_attack_turns(self) -> Optional[bool]:
+        if self.recorder is None and self.stats is None and self._is_ability_free():
+            return self._resolve_ability_free()
+
+        num_turns = 0
+        while len(self.player.battle_pets) > 0 and len(self.challenger.battle_pets) > 0:
+            if num_turns == self.max_turns:
+                return None
+
+            may_stall = self.may_stall()
+            stats = self._get_stats() if may_stall else None
+
+            self.run_attack_turn()
+            num_turns += 1
+
+            if may_stall and self._get_stats() == stats:
+                return None
+
+        return self._determine_winner()
+
+    def _is_ability_free(self) -> bool:
+        return all(ability_type in BUY_STAGE_ABILITY_TYPES for ability_type in self.player.battle_ability_types) \
+            and all(ability_type in BUY_STAGE_ABILITY_TYPES for ability_type in self.challenger.battle_ability_types)
+
+    # Without abilities, every turn the front pets deal the same damage to each other.
+    # So each duel is settled by how many hits the front pets can take instead of turn by turn
+    def _resolve_ability_free(self) -> Optional[bool]:
+        num_turns = 0
+        while len(self.player.battle_pets) > 0 and len(self.challenger.battle_pets) > 0:
+            player_front = self.player.battle_pets[0]
+            challenger_front = self.challenger.battle_pets[0]
+
+            player_damage = self._get_damage_taken(player_front, challenger_front)
+            challenger_damage = self._get_damage_taken(challenger_front, player_front)
+            if player_damage == 0 and challenger_damage == 0:
+                return None
+
+            turns = min(self._get_hits_to_faint(player_front, player_damage), self._get_hits_to_faint(challenger_front, challenger_damage))
+            num_turns += turns
+            if num_turns > self.max_turns:
+                return None
+
+            player_front.change_health(-turns * player_damage)
+            challenger_front.change_health(-turns * challenger_damage)
+            for front in (player_front, challenger_front):
+                if not front.is_alive():
+                    if front.carried_food is FOOD_CONFIG[FoodType.HONEY]:
+                        front.player.summon_bee(front)
+                    front.player.battle_pets.remove(front)
+
+        return self._determine_winner()
+
+    def _get_damage_taken(self, pet: 'BattlePet', enemy_pet: 'BattlePet') -> int:
+        damage = enemy_pet.get_attack() + enemy_pet.get_bonus_attack()
+        if pet.carried_food is FOOD_CONFIG[FoodType.GARLIC]:
+            damage = max(damage - 2, 1)
+        return damage
+
+    def _get_hits_to_faint(self, pet: 'BattlePet', damage: int) -> int:
+        if damage == 0:
+            return self.max_turns + 1
+        return -(-pet.get_health() // damage)
+
+    def add_hurt_or_fainted_or_bee(self, pet: 'BattlePet'):
+        if not pet.is_queued:
+            pet.is_queued = True
             self.hurt_and_faint_and_bee.append(pet)
 
-    # Remove dead pets and empty slots
+    # Remove dead pets. Fainted pets still waiting for their triggers are kept
+    # Nothing needs to be done unless a pet has fainted since the last cleanup
     def _cleanup_battle_pets(self):
-        self.player.battle_pets = [pet for pet in self.player.battle_pets if pet is not None and (pet.is_alive() or pet in self.hurt_and_faint_and_bee)]
-        self.challenger.battle_pets = [pet for pet in self.challenger.battle_pets if pet is not None and (pet.is_alive() or pet in self.hurt_and_faint_and_bee)]
+        if not self.has_fainted_pets: return
+
+        self.player.battle_pets = [pet for pet in self.player.battle_pets if pet.is_alive() or pet.is_queued]
+        self.challenger.battle_pets = [pet for pet in self.challenger.battle_pets if pet.is_alive() or pet.is_queued]
+        self.has_fainted_pets = any(pet.is_queued for pet in self.hurt_and_faint_and_bee)
+
+    # A turn that changes no pet or its health or attack leaves the battle as it was,
+    # so it would repeat forever. That needs both front pets to deal no damage,
+    # so the stats are only compared on those turns
+    def may_stall(self) -> bool:
+        return self._deals_no_damage(self.player.battle_pets[0]) and self._deals_no_damage(self.challenger.battle_pets[0])
+
+    def _deals_no_damage(self, pet: 'BattlePet') -> bool:
+        return pet.get_attack() + pet.get_bonus_attack() == 0
+
+    def _get_stats(self) -> tuple:
+        return (
+            [(pet, pet.get_health(), pet.get_attack()) for pet in self.player.battle_pets],
+            [(pet, pet.get_health(), pet.get_attack()) for pet in self.challenger.battle_pets],
+        )
+
+    def _has_ability_type(self, ability_type: 'AbilityType') -> bool:
+        return ability_type in self.player.battle_ability_types or ability_type in self.challenger.battle_ability_types
 
     # Higher level and stat pets get to go first
-    def _priority_sort(self, pets: List['PetState']) -> List['PetState']:
+    def _priority_sort(self, pets: List['BattlePet']) -> List['BattlePet']:
         pets.sort(key = lambda pet: (pet.sub_level, pet.get_health() + pet.get_attack()), reverse = True)
         return pets
 
-    def _determine_winner(self) -> bool:
+    def _determine_winner(self) -> Optional[bool]:
         if len(self.player.battle_pets) == 0 and len(self.challenger.battle_pets) == 0:
             return None # Tied
         elif len(self.player.battle_pets) == 0:
@@ -90,48 +222,54 @@ class Battle:
             return False # Won
 
     def _proc_battle_round_start(self):
-        battle_round_start: List['PetState'] = []
+        battle_round_start: List['BattlePet'] = []
         battle_round_start += [pet for pet in self.player.battle_pets if pet.pet_config.ABILITY_TYPE == AbilityType.BATTLE_ROUND_START]
         battle_round_start += [pet for pet in self.challenger.battle_pets if pet.pet_config.ABILITY_TYPE == AbilityType.BATTLE_ROUND_START]
 
         for pet in self._priority_sort(battle_round_start):
-            pet.pet_config.ABILITY_FUNC(pet, pet.player)
+            pet.use_ability()
 
     def _proc_hurt_and_faint(self):
         while len(self.hurt_and_faint_and_bee) > 0:
-            hurt_and_faint_and_bee = self._priority_sort(copy(self.hurt_and_faint_and_bee))
-            self.hurt_and_faint_and_bee = [] # Clear the list so second-order events trigger
+            hurt_and_faint_and_bee = self._priority_sort(self.hurt_and_faint_and_bee)
+
+            # Clear the queue so second-order events trigger
+            self.hurt_and_faint_and_bee = []
+            for pet in hurt_and_faint_and_bee:
+                pet.is_queued = False
 
             for pet in hurt_and_faint_and_bee:
                 if pet.pet_config.ABILITY_TYPE in [AbilityType.HURT, AbilityType.FAINTED]:
-                    pet.pet_config.ABILITY_FUNC(pet, pet.player)
+                    pet.use_ability()
                 if not pet.is_alive() and pet.carried_food == FOOD_CONFIG[FoodType.HONEY]:
+                    if self.recorder is not None:
+                        self.recorder.record(BattleEventType.FOOD, pet, a = FoodType.HONEY.value)
                     pet.player.summon_bee(pet)
 
             self._cleanup_battle_pets()
 
-    def _proc_before_attack(self, player_front: 'PetState', challenger_front: 'PetState'):
-        before_attack: List['PetState'] = []
+    def _proc_before_attack(self, player_front: 'BattlePet', challenger_front: 'BattlePet'):
+        before_attack: List['BattlePet'] = []
         if player_front.pet_config.ABILITY_TYPE == AbilityType.BEFORE_ATTACK:
             before_attack.append(player_front)
         if challenger_front.pet_config.ABILITY_TYPE == AbilityType.BEFORE_ATTACK:
             before_attack.append(challenger_front)
 
         for pet in self._priority_sort(before_attack):
-            pet.pet_config.ABILITY_FUNC(pet, pet.player)
+            pet.use_ability()
 
-    def _proc_after_attack(self, player_front: 'PetState', challenger_front: 'PetState'):
-        after_attack: List['PetState'] = []
+    def _proc_after_attack(self, player_front: 'BattlePet', challenger_front: 'BattlePet'):
+        after_attack: List['BattlePet'] = []
         if player_front.pet_config.ABILITY_TYPE == AbilityType.AFTER_ATTACK:
             after_attack.append(player_front)
         if challenger_front.pet_config.ABILITY_TYPE == AbilityType.AFTER_ATTACK:
             after_attack.append(challenger_front)
 
         for pet in self._priority_sort(after_attack):
-            pet.pet_config.ABILITY_FUNC(pet, pet.player)
+            pet.use_ability()
 
     def _proc_friend_ahead_attacked(self):
-        friend_ahead_attack: List['PetState'] = []
+        friend_ahead_attack: List['BattlePet'] = []
         if len(self.player.battle_pets) >= 2:
             pet = self.player.battle_pets[1]
             if pet.pet_config.ABILITY_TYPE == AbilityType.FRIEND_AHEAD_ATTACK:
@@ -142,9 +280,9 @@ class Battle:
                 friend_ahead_attack.append(pet)
 
         for pet in self._priority_sort(friend_ahead_attack):
-            pet.pet_config.ABILITY_FUNC(pet, pet.player)
+            pet.use_ability()
 
-    def _add_to_knockout(self, player_front: 'PetState', challenger_front: 'PetState'):
+    def _add_to_knockout(self, player_front: 'BattlePet', challenger_front: 'BattlePet'):
         if player_front.is_alive() and not challenger_front.is_alive():
             self.knockout = player_front
         elif challenger_front.is_alive() and not player_front.is_alive():
@@ -152,4 +290,4 @@ class Battle:
 
     def _proc_knockout(self):
         if self.knockout is not None and self.knockout.pet_config.ABILITY_TYPE == AbilityType.KNOCKOUT:
-            self.knockout.pet_config.ABILITY_FUNC(self.knockout, self.knockout.player)
+            self.knockout.use_ability()
@@ -0,0 +1,45 @@
+from enum import Enum
+
+
+# The events a BattleRecorder writes. Every event is one fixed-width record of
+# (event, turn, pet, other, a, b, c, d); the fields each event uses are listed below.
+# Pets are identified by the id the recorder gave them when they joined the battle
+class BattleEventType(Enum):
+    # A new attack turn starts. Turn 0 is the start of the battle
+    TURN = 1
+
+    # A pet is in the battle when it starts
+    # other: side (0 for the player, 1 for the challenger), a: pet type, b: health, c: attack,
+    # d: sub level + 16 * carried food type (0 for none)
+    SPAWN = 2
+
+    # A pet is summoned in front of another pet
+    # other: the pet it is summoned in front of, a-d: as for SPAWN
+    SUMMON = 3
+
+    # A pet attacks the enemy front pet
+    # other: the enemy pet, a: damage dealt, including bonus attack
+    ATTACK = 4
+
+    # A pet takes damage from an attack or an ability
+    # a: damage taken, after garlic, b: health left
+    DAMAGE = 5
+
+    # A pet's ability fires
+    # a: ability type
+    ABILITY = 6
+
+    # A pet's health or attack changes for any reason
+    # a: health, b: attack
+    STATS = 7
+
+    # A pet faints
+    FAINT = 8
+
+    # A pet's carried food has an effect
+    # a: food type
+    FOOD = 9
+
+    # The battle is over
+    # a: 1 if the player won, 0 on a tie, -1 if the player lost
+    END = 10
@@ -0,0 +1,106 @@
+from typing import TYPE_CHECKING, Optional
+
+from engine.config.foodconfig import FOOD_CONFIG
+from engine.config.foodtype import FoodType
+from engine.config.gameconfig import LEVEL_2_CUTOFF, LEVEL_3_CUTOFF
+from engine.game.abilitytype import AbilityType
+
+if TYPE_CHECKING:
+    from engine.config.foodconfig import FoodConfig
+    from engine.config.petconfig import PetConfig
+    from engine.state.battleplayerstate import BattlePlayerState
+    from engine.state.petstate import PetState
+
+HONEY = FOOD_CONFIG[FoodType.HONEY]
+MEAT_BONE = FOOD_CONFIG[FoodType.MEAT_BONE]
+GARLIC = FOOD_CONFIG[FoodType.GARLIC]
+
+
+# A pet during a battle. It only holds what combat needs, so it is cheap to create
+# at the start of every battle. Changes to it never make it back to the PetState
+class BattlePet:
+    __slots__ = ("pet_config", "_health", "_attack", "sub_level", "carried_food", "player", "is_queued")
+
+    @staticmethod
+    def from_pet_state(pet: 'PetState', player: 'BattlePlayerState') -> 'BattlePet':
+        return BattlePet(pet.get_health(), pet.get_attack(), pet.pet_config, player, pet.sub_level, pet.carried_food)
+
+    def __init__(self, health: int, attack: int, pet_config: 'PetConfig', player: 'BattlePlayerState', sub_level: int = 0, carried_food: Optional['FoodConfig'] = None):
+        self.pet_config = pet_config
+        self._health = health
+        self._attack = attack
+        self.sub_level = sub_level
+        self.carried_food = carried_food
+        self.player = player
+
+        # Whether the pet is waiting in the battle's hurt/faint/bee queue
+        self.is_queued = False
+
+    def get_level(self) -> int:
+        if self.sub_level == LEVEL_3_CUTOFF:
+            return 3
+        elif self.sub_level >= LEVEL_2_CUTOFF:
+            return 2
+        else:
+            return 1
+
+    def damage_enemy_with_attack(self, enemy_pet: 'BattlePet'):
+        enemy_pet._take_damage(self._attack + self.get_bonus_attack())
+
+    def damage_enemy_with_ability(self, attack, enemy_pet: 'BattlePet'):
+        enemy_pet._take_damage(attack)
+
+    def use_ability(self):
+        self.pet_config.ABILITY_FUNC(self, self.player)
+
+    def proc_on_demand_ability(self, ability_type: AbilityType):
+        if self.pet_config.ABILITY_TYPE == ability_type:
+            self.use_ability()
+
+    def change_health(self, amount: int):
+        self._health += amount
+        self._health = min(max(0, self._health), 50)
+
+    def change_attack(self, amount: int):
+        self._attack += amount
+        self._attack = min(max(0, self._attack), 50)
+
+    def get_bonus_attack(self) -> int:
+        if self.carried_food is MEAT_BONE:
+            return 3
+        else:
+            return 0
+
+    def get_health(self) -> int:
+        return self._health
+
+    def get_attack(self) -> int:
+        return self._attack
+
+    def is_alive(self) -> bool:
+        return self._health > 0
+
+    def on_death(self):
+        if self.pet_config.ABILITY_TYPE == AbilityType.FAINTED:
+            self.player.battle.add_hurt_or_fainted_or_bee(self)
+
+        if self.carried_food is HONEY:
+            self.player.battle.add_hurt_or_fainted_or_bee(self)
+
+    def _take_damage(self, amount: int):
+        if self._health <= 0: return
+
+        if self.carried_food is GARLIC:
+            amount = max(amount - 2, 1)
+
+        self.change_health(-amount)
+
+        if self.pet_config.ABILITY_TYPE == AbilityType.HURT:
+            self.player.battle.add_hurt_or_fainted_or_bee(self)
+
+        if self._health <= 0:
+            self.player.battle.has_fainted_pets = True
+            self.on_death()
+
+    def __repr__(self) -> str:
+        return f"{self.pet_config.PET_NAME}({self._health}/{self._attack})"
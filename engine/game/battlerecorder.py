@@ -0,0 +1,86 @@
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from engine.config.foodconfig import FOOD_CONFIG
+from engine.config.petconfig import PET_CONFIG
+from engine.game.battleeventtype import BattleEventType
+from engine.game.recordingbattlepet import RecordingBattlePet
+
+if TYPE_CHECKING:
+    from engine.game.battle import Battle
+    from engine.game.battlepet import BattlePet
+
+# Every record is RECORD_SIZE signed 16-bit fields: (event, turn, pet, other, a, b, c, d)
+RECORD_SIZE = 8
+RECORD_TYPECODE = "h"
+
+# Used in the pet and other fields when the event has no pet there
+NO_PET = -1
+
+PET_TYPES = {pet_config: pet_type for pet_type, pet_config in PET_CONFIG.items()}
+FOOD_TYPES = {food_config: food_type for food_type, food_config in FOOD_CONFIG.items()}
+
+
+# Records the events of one battle as fixed-width integer records. Attach it with
+# Battle.recorder before the battle starts. Battles without a recorder only pay
+# for a few None checks, since recording is done by switching the battle's pets to
+# RecordingBattlePet once the recorder has seen them
+class BattleRecorder:
+    def __init__(self):
+        self.records = array(RECORD_TYPECODE)
+        self.turn = 0
+
+        # Holds on to the recorded pets so their id() can't be reused during the battle
+        self._pets: List['BattlePet'] = []
+        self._pet_ids: Dict[int, int] = {}
+
+    # Clears the previous battle, so a recorder can be reused between battles
+    def start_battle(self, battle: 'Battle'):
+        self.records = array(RECORD_TYPECODE)
+        self.turn = 0
+        self._pets = []
+        self._pet_ids = {}
+
+        for side, player in enumerate((battle.player, battle.challenger)):
+            for pet in player.battle_pets:
+                self._add_pet(BattleEventType.SPAWN, pet, side)
+
+    def record_turn(self):
+        self.turn += 1
+        self.record(BattleEventType.TURN, None)
+
+    def record_summon(self, pet: 'BattlePet', pet_behind: 'BattlePet'):
+        self._add_pet(BattleEventType.SUMMON, pet, self._get_pet_id(pet_behind))
+
+    def record_end(self, player_lost: Optional[bool]):
+        outcome = 0 if player_lost is None else (-1 if player_lost else 1)
+        self.record(BattleEventType.END, None, a = outcome)
+
+    def record(self, event: 'BattleEventType', pet: Optional['BattlePet'], other: Optional['BattlePet'] = None, a: int = 0, b: int = 0):
+        self.records.extend((event.value, self.turn, self._get_pet_id(pet), self._get_pet_id(other), a, b, 0, 0))
+
+    def get_bytes(self) -> bytes:
+        return self.records.tobytes()
+
+    def get_records(self) -> Iterator[Tuple[int, ...]]:
+        for i in range(0, len(self.records), RECORD_SIZE):
+            yield tuple(self.records[i:i + RECORD_SIZE])
+
+    def __len__(self) -> int:
+        return len(self.records) // RECORD_SIZE
+
+    def _get_pet_id(self, pet: Optional['BattlePet']) -> int:
+        return NO_PET if pet is None else self._pet_ids[id(pet)]
+
+    def _add_pet(self, event: 'BattleEventType', pet: 'BattlePet', other: int):
+        pet.__class__ = RecordingBattlePet
+
+        pet_id = len(self._pets)
+        self._pets.append(pet)
+        self._pet_ids[id(pet)] = pet_id
+
+        food = FOOD_TYPES[pet.carried_food].value if pet.carried_food is not None else 0
+        self.records.extend((
+            event.value, self.turn, pet_id, other,
+            PET_TYPES[pet.pet_config].value, pet.get_health(), pet.get_attack(), pet.sub_level + 16 * food
+        ))
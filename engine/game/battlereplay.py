@@ -0,0 +1,167 @@
+from array import array
+from typing import List, Optional, Tuple, Union
+
+from engine.config.foodconfig import FOOD_CONFIG
+from engine.config.foodtype import FoodType
+from engine.config.petconfig import PET_CONFIG
+from engine.config.pettype import PetType
+from engine.game.battleeventtype import BattleEventType
+from engine.game.battlepet import BattlePet
+from engine.game.battlerecorder import RECORD_SIZE, RECORD_TYPECODE
+
+TURN = BattleEventType.TURN.value
+SPAWN = BattleEventType.SPAWN.value
+SUMMON = BattleEventType.SUMMON.value
+STATS = BattleEventType.STATS.value
+END = BattleEventType.END.value
+
+# The player's and the challenger's pets, front pet first
+Lineups = Tuple[List['BattlePet'], List['BattlePet']]
+
+
+# Rebuilds the state of a recorded battle from its BattleRecorder trace, without
+# running the battle again. The lineups at the start of every turn are saved while
+# loading, so seeking to a turn only replays that turn's records
+class BattleReplay:
+    def __init__(self, trace: Union[bytes, 'array']):
+        if isinstance(trace, array):
+            self.records = trace
+        else:
+            self.records = array(RECORD_TYPECODE)
+            self.records.frombytes(trace)
+
+        self.num_records = len(self.records) // RECORD_SIZE
+
+        # Pets by recorder id. Health and attack start at their values when the pet joined the battle
+        self._pet_sides: List[int] = []
+        self._pet_types: List[int] = []
+        self._pet_sub_levels: List[int] = []
+        self._pet_foods: List[int] = []
+        self._initial_health: List[int] = []
+        self._initial_attack: List[int] = []
+
+        # (record index, pet ids, health, attack) at the start of every turn
+        self._checkpoints: List[Tuple[int, Tuple[List[int], List[int]], List[int], List[int]]] = []
+
+        self._load_pets()
+        self._load_checkpoints()
+
+    # Returns the number of attack turns in the battle
+    def get_num_turns(self) -> int:
+        return len(self._checkpoints) - 1
+
+    # Returns whether the player lost (None on a tie), like Battle.fight
+    def get_outcome(self) -> Optional[bool]:
+        if self.num_records == 0 or self.records[-RECORD_SIZE] != END:
+            raise ValueError("The trace does not contain a finished battle")
+
+        outcome = self.records[-RECORD_SIZE + 4]
+        return None if outcome == 0 else outcome < 0
+
+    # Returns the lineups at the start of attack turn `turn`. Turn 0 is the start of
+    # the battle, before any battle round start abilities
+    def seek(self, turn: int) -> 'Lineups':
+        if not 0 <= turn < len(self._checkpoints):
+            raise ValueError(f"The battle has turns 0 to {self.get_num_turns()} but turn {turn} was requested")
+
+        _, pet_ids, health, attack = self._checkpoints[turn]
+        return self._create_lineups(pet_ids, health, attack)
+
+    # Returns the lineups after the first `num_records` records, without fainted pets
+    def get_state(self, num_records: int) -> 'Lineups':
+        if not 0 <= num_records <= self.num_records:
+            raise ValueError(f"The trace has {self.num_records} records but {num_records} were requested")
+
+        # Start from the last turn that starts at or before the record
+        start, pet_ids, health, attack = 0, ([], []), self._initial_health, self._initial_attack
+        for checkpoint in self._checkpoints:
+            if checkpoint[0] > num_records: break
+            start, pet_ids, health, attack = checkpoint
+
+        pet_ids = (list(pet_ids[0]), list(pet_ids[1]))
+        health = list(health)
+        attack = list(attack)
+        for index in range(start, num_records):
+            pet_ids = self._apply_record(index, pet_ids, health, attack)
+        return self._create_lineups(pet_ids, health, attack)
+
+    def get_final_lineups(self) -> 'Lineups':
+        return self.get_state(self.num_records)
+
+    def _get_record(self, index: int) -> 'array':
+        return self.records[index * RECORD_SIZE:(index + 1) * RECORD_SIZE]
+
+    def _load_pets(self):
+        for index in range(self.num_records):
+            event, _, pet, other, pet_type, health, attack, sub_level_and_food = self._get_record(index)
+            if event != SPAWN and event != SUMMON: continue
+
+            self._pet_sides.append(other if event == SPAWN else self._pet_sides[other])
+            self._pet_types.append(pet_type)
+            self._pet_sub_levels.append(sub_level_and_food % 16)
+            self._pet_foods.append(sub_level_and_food // 16)
+            self._initial_health.append(health)
+            self._initial_attack.append(attack)
+
+    def _load_checkpoints(self):
+        pet_ids: Tuple[List[int], List[int]] = ([], [])
+        health = list(self._initial_health)
+        attack = list(self._initial_attack)
+
+        for index in range(self.num_records):
+            event = self.records[index * RECORD_SIZE]
+
+            # Turn 0 starts once every pet has been placed
+            if len(self._checkpoints) == 0 and event != SPAWN:
+                pet_ids = self._remove_fainted(pet_ids, health)
+                self._save_checkpoint(index, pet_ids, health, attack)
+
+            if event == TURN:
+                pet_ids = self._remove_fainted(pet_ids, health)
+                self._save_checkpoint(index, pet_ids, health, attack)
+
+            pet_ids = self._apply_record(index, pet_ids, health, attack)
+
+        if len(self._checkpoints) == 0:
+            self._save_checkpoint(self.num_records, self._remove_fainted(pet_ids, health), health, attack)
+
+    def _save_checkpoint(self, index: int, pet_ids: Tuple[List[int], List[int]], health: List[int], attack: List[int]):
+        self._checkpoints.append((index, (list(pet_ids[0]), list(pet_ids[1])), list(health), list(attack)))
+
+    # Applies one record and returns the pet ids of both lineups
+    def _apply_record(self, index: int, pet_ids: Tuple[List[int], List[int]], health: List[int], attack: List[int]) -> Tuple[List[int], List[int]]:
+        event, _, pet, other, a, b, _, _ = self._get_record(index)
+
+        if event == STATS:
+            health[pet] = a
+            attack[pet] = b
+        elif event == SPAWN:
+            pet_ids[other].append(pet)
+        elif event == SUMMON:
+            lineup = pet_ids[self._pet_sides[other]]
+            lineup.insert(lineup.index(other), pet)
+        elif event == TURN or event == END:
+            # Fainted pets have been cleaned up by the end of every turn
+            pet_ids = self._remove_fainted(pet_ids, health)
+
+        return pet_ids
+
+    def _remove_fainted(self, pet_ids: Tuple[List[int], List[int]], health: List[int]) -> Tuple[List[int], List[int]]:
+        return (
+            [pet for pet in pet_ids[0] if health[pet] > 0],
+            [pet for pet in pet_ids[1] if health[pet] > 0],
+        )
+
+    # Creates battle pets that aren't part of any battle
+    def _create_lineups(self, pet_ids: Tuple[List[int], List[int]], health: List[int], attack: List[int]) -> 'Lineups':
+        lineups = ([], [])
+        for side in range(2):
+            for pet in pet_ids[side]:
+                if health[pet] <= 0: continue
+
+                food = self._pet_foods[pet]
+                lineups[side].append(BattlePet(
+                    health[pet], attack[pet], PET_CONFIG[PetType(self._pet_types[pet])], None,
+                    self._pet_sub_levels[pet], FOOD_CONFIG[FoodType(food)] if food != 0 else None
+                ))
+        return lineups
@@ -0,0 +1,73 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from engine.game.battle import Battle
+from engine.sim.lineuppet import LineupPet
+from engine.sim.simulator import LineupDescription, Simulator
+
+if TYPE_CHECKING:
+    from engine.output.gamelog import GameLog
+    from engine.state.gamestate import GameState
+    from engine.state.playerstate import PlayerState
+
+
+# Runs the battles of a battle stage. Battles only read the pets and each one gets its
+# own seed from the game's RNG at the start of the round, so a battle can be fought as
+# soon as both of its lineups are final, while other players are still buying. The
+# outcomes are applied to health and the game log in player order once everyone is done
+class BattleStageHelper:
+    def __init__(self, state: 'GameState', log: 'GameLog', num_workers: int = 0):
+        self.state = state
+        self.log = log
+
+        # Without worker processes, battles are fought on a thread so they still
+        # overlap with waiting on the players
+        self.executor: 'Executor' = ProcessPoolExecutor(num_workers) if num_workers > 0 else ThreadPoolExecutor(1)
+
+        self.players: List['PlayerState'] = []
+        self._seeds: Dict[int, int] = {}
+        self._lineups: Dict[int, 'LineupDescription'] = {}
+        self._battles: Dict[int, 'Future'] = {}
+
+    # Call before the buy stage of every round, with the players that will battle
+    def start_round(self, players: List['PlayerState']):
+        self.players = players
+        self._seeds = {player.player_num: self.state.rng.getrandbits(64) for player in players}
+        self._lineups = {}
+        self._battles = {}
+
+    # Call once the player's lineup can't change anymore. Starts every battle that
+    # was only waiting on this lineup
+    def lineup_ready(self, player: 'PlayerState'):
+        self._lineups[player.player_num] = self._get_lineup(player)
+
+        for battle_player in self.players:
+            if battle_player.player_num in self._battles: continue
+            if battle_player.player_num not in self._lineups or battle_player.challenger.player_num not in self._lineups: continue
+
+            self._battles[battle_player.player_num] = self.executor.submit(
+                fight_battle,
+                self._lineups[battle_player.player_num],
+                self._lineups[battle_player.challenger.player_num],
+                self._seeds[battle_player.player_num],
+                self.state.round
+            )
+
+    # Waits for every battle of the round and applies the outcomes in player order
+    def run(self):
+        for player in self.players:
+            player_lost = self._battles[player.player_num].result()
+            Battle(player, player.challenger, self.state, self.log).end_battle(player_lost)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def _get_lineup(self, player: 'PlayerState') -> 'LineupDescription':
+        return [LineupPet.from_pet_state(pet) if pet is not None else None for pet in player.pets]
+
+
+# Fights one battle of a battle stage and returns whether lineup A lost (None on a tie)
+def fight_battle(lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', seed: int, round: int) -> Optional[bool]:
+    simulator = Simulator(lineup_a, lineup_b, seed)
+    simulator.state.round = round
+    return simulator.run_battle()
@@ -0,0 +1,120 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from engine.config.gameconfig import PET_POSITIONS
+from engine.game.abilitytype import AbilityType
+from engine.game.statsbattlepet import StatsBattlePet
+
+if TYPE_CHECKING:
+    from engine.game.battle import Battle
+    from engine.game.battlepet import BattlePet
+    from engine.state.battleplayerstate import BattlePlayerState
+
+# Pets are counted by side (0 is the player, 1 the challenger) and by their slot in the
+# lineup, front pet first. Summoned pets all share the slot after the lineup's
+SUMMONED_SLOT = PET_POSITIONS
+
+
+# Integer counters over every battle fought while attached to Battle.stats:
+#   - num_battles and num_turns (attack turns)
+#   - damage_dealt[side][slot]: health taken from the other side's pets by attacks and abilities,
+#     up to the health they had left
+#   - ability_uses[side][ability type value]
+#   - summons[side]
+#   - first_deaths[side][slot]: how often each slot was the first of its side to faint
+# Like BattleRecorder, it switches the battle's pets to StatsBattlePet, so battles without
+# stats aren't slowed down. Stats only hold integers between battles, so they can be
+# pickled back from worker processes and added up with merge()
+class BattleStats:
+    def __init__(self):
+        self.num_battles = 0
+        self.num_turns = 0
+        self.damage_dealt = [[0] * (PET_POSITIONS + 1) for _ in range(2)]
+        self.ability_uses = [[0] * (max(ability_type.value for ability_type in AbilityType) + 1) for _ in range(2)]
+        self.summons = [0, 0]
+        self.first_deaths = [[0] * (PET_POSITIONS + 1) for _ in range(2)]
+
+        # (side, slot) of the pets in the current battle. Holds on to the pets so their id() can't be reused
+        self._pets: List['BattlePet'] = []
+        self._pet_slots: Dict[int, Tuple[int, int]] = {}
+        self._has_death = [False, False]
+        self._player: Optional['BattlePlayerState'] = None
+
+    def start_battle(self, battle: 'Battle'):
+        self.num_battles += 1
+        self._pets = []
+        self._pet_slots = {}
+        self._has_death = [False, False]
+        self._player = battle.player
+
+        for side, player in enumerate((battle.player, battle.challenger)):
+            for slot, pet in enumerate(player.battle_pets):
+                self._add_pet(pet, side, slot)
+
+    # Lets go of the battle's pets, so only the counters are left
+    def end_battle(self):
+        self._pets = []
+        self._pet_slots = {}
+        self._player = None
+
+    def record_summon(self, pet: 'BattlePet'):
+        side = self.get_side(pet)
+        self.summons[side] += 1
+        self._add_pet(pet, side, SUMMONED_SLOT)
+
+    def record_attack(self, pet: 'BattlePet'):
+        # Every turn, the player's front pet attacks exactly once
+        if pet.player is self._player:
+            self.num_turns += 1
+
+    def record_damage(self, pet: 'BattlePet', damage: int):
+        side, slot = self._pet_slots[id(pet)]
+        self.damage_dealt[side][slot] += damage
+
+    def record_ability(self, pet: 'BattlePet'):
+        self.ability_uses[self.get_side(pet)][pet.pet_config.ABILITY_TYPE.value] += 1
+
+    def record_faint(self, pet: 'BattlePet'):
+        side, slot = self._pet_slots[id(pet)]
+        if not self._has_death[side]:
+            self._has_death[side] = True
+            self.first_deaths[side][slot] += 1
+
+    def get_side(self, pet: 'BattlePet') -> int:
+        return 0 if pet.player is self._player else 1
+
+    def merge(self, other: 'BattleStats'):
+        self.num_battles += other.num_battles
+        self.num_turns += other.num_turns
+        for side in range(2):
+            self.summons[side] += other.summons[side]
+            _add_counts(self.damage_dealt[side], other.damage_dealt[side])
+            _add_counts(self.ability_uses[side], other.ability_uses[side])
+            _add_counts(self.first_deaths[side], other.first_deaths[side])
+
+    def get_view(self) -> dict:
+        return {
+            "num_battles": self.num_battles,
+            "num_turns": self.num_turns,
+            "damage_dealt": self.damage_dealt,
+            "ability_uses": [{ability_type.name: uses[ability_type.value] for ability_type in AbilityType if uses[ability_type.value] > 0} for uses in self.ability_uses],
+            "summons": self.summons,
+            "first_deaths": self.first_deaths
+        }
+
+    def _add_pet(self, pet: 'BattlePet', side: int, slot: int):
+        pet.__class__ = StatsBattlePet
+        self._pets.append(pet)
+        self._pet_slots[id(pet)] = (side, slot)
+
+    # Dropped when pickled, since they only matter during a battle
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_pets"] = []
+        state["_pet_slots"] = {}
+        state["_player"] = None
+        return state
+
+
+def _add_counts(counts: List[int], other_counts: List[int]):
+    for index, count in enumerate(other_counts):
+        counts[index] += count
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
 from engine.config.gameconfig import MAX_MOVES_PER_ROUND, PET_BUY_COST, REROLL_COST
 from engine.game.abilitytype import AbilityType
@@ -21,37 +21,57 @@ class BuyStageHelper:
         self.output_handler = output_handler
         self.input_helper = InputHelper(state, output_handler)
 
-    def run(self, player: 'PlayerState'):
-        for moves in range(MAX_MOVES_PER_ROUND):
-            input = self.input_helper.get_player_input(player, MAX_MOVES_PER_ROUND - moves)
-
-            if input.move_type == MoveType.BUY_PET:
-                self._buy_pet(player, input)
-            elif input.move_type == MoveType.BUY_FOOD:
-                self._buy_food(player, input)
-            elif input.move_type == MoveType.UPGRADE_PET_FROM_PETS:
-                self._upgrade_pet_from_pets(player, input)
-            elif input.move_type == MoveType.UPGRADE_PET_FROM_SHOP:
-                self._upgrade_pet_from_shop(player, input)
-            elif input.move_type == MoveType.SELL_PET:
-                self._sell_pet(player, input)
-            elif input.move_type == MoveType.REROLL:
-                self._reroll(player, input)
-            elif input.move_type == MoveType.FREEZE_PET:
-                self._freeze_pet(player, input)
-            elif input.move_type == MoveType.FREEZE_FOOD:
-                self._freeze_food(player, input)
-            elif input.move_type == MoveType.UNFREEZE_PET:
-                self._unfreeze_pet(player, input)
-            elif input.move_type == MoveType.UNFREEZE_FOOD:
-                self._unfreeze_food(player, input)
-            elif input.move_type == MoveType.SWAP_PET:
-                self._swap_pet(player, input)
-            elif input.move_type == MoveType.END_TURN:
-                self.log.write_buy_stage_log(player, "End turn")
-                return
+    # Runs the buy stages of all the players at the same time. Every player is sent their
+    # view, and each move is applied as soon as it arrives, so slow players don't hold up
+    # the others. Players only change their own state while buying, so the order moves
+    # arrive in doesn't matter. on_done is called with each player once their turn is over
+    def run(self, players: List['PlayerState'], on_done: Callable[['PlayerState'], None]):
+        remaining_moves: Dict[int, int] = {}
+        for player in players:
+            remaining_moves[player.player_num] = MAX_MOVES_PER_ROUND
+            self.input_helper.send_view(player, MAX_MOVES_PER_ROUND)
+
+        num_buying = len(players)
+        while num_buying > 0:
+            player, input = self.input_helper.get_next_input()
+            remaining_moves[player.player_num] -= 1
+
+            if self._apply_move(player, input) or remaining_moves[player.player_num] == 0:
+                num_buying -= 1
+                on_done(player)
             else:
-                raise Exception(f'Invalid move type: {input.move_type}')
+                self.input_helper.send_view(player, remaining_moves[player.player_num])
+
+    # Returns whether the move ended the player's turn
+    def _apply_move(self, player: 'PlayerState', input: 'PlayerInput') -> bool:
+        if input.move_type == MoveType.BUY_PET:
+            self._buy_pet(player, input)
+        elif input.move_type == MoveType.BUY_FOOD:
+            self._buy_food(player, input)
+        elif input.move_type == MoveType.UPGRADE_PET_FROM_PETS:
+            self._upgrade_pet_from_pets(player, input)
+        elif input.move_type == MoveType.UPGRADE_PET_FROM_SHOP:
+            self._upgrade_pet_from_shop(player, input)
+        elif input.move_type == MoveType.SELL_PET:
+            self._sell_pet(player, input)
+        elif input.move_type == MoveType.REROLL:
+            self._reroll(player, input)
+        elif input.move_type == MoveType.FREEZE_PET:
+            self._freeze_pet(player, input)
+        elif input.move_type == MoveType.FREEZE_FOOD:
+            self._freeze_food(player, input)
+        elif input.move_type == MoveType.UNFREEZE_PET:
+            self._unfreeze_pet(player, input)
+        elif input.move_type == MoveType.UNFREEZE_FOOD:
+            self._unfreeze_food(player, input)
+        elif input.move_type == MoveType.SWAP_PET:
+            self._swap_pet(player, input)
+        elif input.move_type == MoveType.END_TURN:
+            self.log.write_buy_stage_log(player, "End turn")
+            return True
+        else:
+            raise Exception(f'Invalid move type: {input.move_type}')
+        return False
 
     def _buy_pet(self, player: 'PlayerState', input: 'PlayerInput'):
         new_pet = player.shop_pets[input.index_from]
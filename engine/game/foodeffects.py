@@ -1,4 +1,3 @@
-from random import sample
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -24,7 +23,7 @@ class FoodEffects:
         pets = [pet for pet in player.pets if pet is not None]
 
         num_choose = 2 if len(pets) >= 2 else len(pets)
-        pets_to_upgrade = sample(pets, num_choose)
+        pets_to_upgrade = player.rng.sample(pets, num_choose)
         for pet in pets_to_upgrade:
             pet.perm_increase_health(1)
             pet.perm_increase_attack(1)
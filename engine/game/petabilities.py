@@ -1,9 +1,10 @@
-from random import sample, choice
 from typing import TYPE_CHECKING
 
 from engine.config.pettype import TIER_PETS, PetType
 
 if TYPE_CHECKING:
+    from engine.game.battlepet import BattlePet
+    from engine.state.battleplayerstate import BattlePlayerState
     from engine.state.petstate import PetState
     from engine.state.playerstate import PlayerState
 
@@ -19,7 +20,7 @@ class PetAbilities:
         if other_pets == 0: return
 
         num_choose = 2 if len(other_pets) >= 2 else 1
-        pets_to_upgrade = sample(other_pets, num_choose)
+        pets_to_upgrade = player.rng.sample(other_pets, num_choose)
         for pet in pets_to_upgrade:
             pet.perm_increase_health(fish.get_level() - 1)
             pet.perm_increase_attack(fish.get_level() - 1)
@@ -39,49 +40,49 @@ class PetAbilities:
         if other_pets == 0: return
 
         num_choose = 2 if len(other_pets) >= 2 else 1
-        pets_to_upgrade = sample(other_pets, num_choose)
+        pets_to_upgrade = player.rng.sample(other_pets, num_choose)
         for pet in pets_to_upgrade:
             pet.perm_increase_attack(beaver.get_level())
 
     @staticmethod
     # On faint, give L attack and health to a random friend
-    def ant_ability(ant: 'PetState', player: 'PlayerState'):
+    def ant_ability(ant: 'BattlePet', player: 'BattlePlayerState'):
         other_pets = [pet for pet in player.battle_pets if pet != ant and pet is not None]
 
         # If there are no other pets we're done
         if len(other_pets) == 0: return
 
-        pet_to_upgrade = choice(other_pets)
+        pet_to_upgrade = player.rng.choice(other_pets)
         pet_to_upgrade.change_attack(ant.get_level())
         pet_to_upgrade.change_health(ant.get_level())
 
     @staticmethod
     # At start of battle, deal 1 damage to L enemies
-    def mosquito_ability(mosquito: 'PetState', player: 'PlayerState'):
+    def mosquito_ability(mosquito: 'BattlePet', player: 'BattlePlayerState'):
         targets = player.opponent.battle_pets
 
         # If there are no other pets we're done
         if len(targets) == 0: return
 
         num_choose = mosquito.get_level() if len(targets) >= mosquito.get_level() else len(targets)
-        pets_to_snipe = sample(targets, num_choose)
+        pets_to_snipe = player.rng.sample(targets, num_choose)
         for pet in pets_to_snipe:
             mosquito.damage_enemy_with_ability(1, pet)
 
     @staticmethod
     # On faint, spawn a zombie cricket with L attack and health
-    def cricket_ability(cricket: 'PetState', player: 'PlayerState'):
+    def cricket_ability(cricket: 'BattlePet', player: 'BattlePlayerState'):
         zombie_cricket = player.create_pet_to_summon(PetType.ZOMBIE_CRICKET, cricket.get_level(), cricket.get_level())
         player.summon_pets(cricket, [zombie_cricket])
 
     @staticmethod
     # Friend summoned, give L attack until the end of combat
-    def horse_ability(horse: 'PetState', player: 'PlayerState'):
+    def horse_ability(horse: 'BattlePet', player: 'BattlePlayerState'):
         player.new_summoned_pet.change_attack(horse.get_level())
 
     @staticmethod
     # Start of combat, gain 0.5L health from the healthiest friend
-    def crab_ability(crab: 'PetState', player: 'PlayerState'):
+    def crab_ability(crab: 'BattlePet', player: 'BattlePlayerState'):
         highest_health = max([pet.get_health() for pet in player.pets if pet != crab and pet is not None])
         crab.change_health(int(0.5 * highest_health * crab.get_level()))
 
@@ -93,24 +94,24 @@ class PetAbilities:
     
     @staticmethod
     # On faint, deal 2L damage to all
-    def hedgehog_ability(hedgehog: 'PetState', player: 'PlayerState'):
+    def hedgehog_ability(hedgehog: 'BattlePet', player: 'BattlePlayerState'):
         for pet in player.battle_pets + player.opponent.battle_pets:
             hedgehog.damage_enemy_with_ability(2 * hedgehog.get_level(), pet)
 
     @staticmethod
     # When hurt, gain 4L attack
-    def peacock_ability(peacock: 'PetState', player: 'PlayerState'):
+    def peacock_ability(peacock: 'BattlePet', player: 'BattlePlayerState'):
         peacock.change_attack(4 * peacock.get_level())
 
     @staticmethod
     # Friend ahead attacks, gain L health and damage
-    def kangaroo_ability(kangaroo: 'PetState', player: 'PlayerState'):
+    def kangaroo_ability(kangaroo: 'BattlePet', player: 'BattlePlayerState'):
         kangaroo.change_attack(kangaroo.get_level())
         kangaroo.change_health(kangaroo.get_level())
 
     @staticmethod
     # On faint, give L health and attack to two nearest pets behind
-    def flamingo_ability(flamingo: 'PetState', player: 'PlayerState'):
+    def flamingo_ability(flamingo: 'BattlePet', player: 'BattlePlayerState'):
         index = player.battle_pets.index(flamingo)
 
         if len(player.battle_pets) > index + 1:
@@ -123,21 +124,21 @@ class PetAbilities:
 
     @staticmethod
     # On faint, summon a tier 3 pet with 2L health and attack
-    def spider_ability(spider: 'PetState', player: 'PlayerState'):
-        pet_type = choice(TIER_PETS[3])
+    def spider_ability(spider: 'BattlePet', player: 'BattlePlayerState'):
+        pet_type = player.rng.choice(TIER_PETS[3])
         pet = player.create_pet_to_summon(pet_type, 2 * spider.get_level(), 2 * spider.get_level())
         player.summon_pets(spider, [pet])
 
     @staticmethod
     # Start of battle, give 0.5L attack to the nearest friend ahead
-    def dodo_ability(dodo: 'PetState', player: 'PlayerState'):
+    def dodo_ability(dodo: 'BattlePet', player: 'BattlePlayerState'):
         dodo_index = player.battle_pets.index(dodo)
         if dodo_index != 0:
             player.battle_pets[dodo_index - 1].change_attack(int(0.5 * dodo.get_attack() * dodo.get_level()))
 
     @staticmethod
     # Before faint, deal 0.5L attack damage to the adjacent pets. Includes your own pets
-    def badger_ability(badger: 'PetState', player: 'PlayerState'):
+    def badger_ability(badger: 'BattlePet', player: 'BattlePlayerState'):
         attack = int(0.5 * badger.get_attack() * badger.get_level())
         index = player.battle_pets.index(badger)
 
@@ -152,7 +153,7 @@ class PetAbilities:
 
     @staticmethod
     # Start of battle, deal 3 damage to the lowest health enemy. Triggers L times
-    def dolphin_ability(dolphin: 'PetState', player: 'PlayerState'):
+    def dolphin_ability(dolphin: 'BattlePet', player: 'BattlePlayerState'):
         for _ in range(dolphin.get_level()):
             pets = [pet for pet in player.opponent.battle_pets if pet.is_alive()]
             pets.sort(key = lambda pet: pet.get_health())
@@ -178,7 +179,7 @@ class PetAbilities:
 
     @staticmethod
     # When hurt, give nearest friend behind 2L attack and health
-    def camel_ability(camel: 'PetState', player: 'PlayerState'):
+    def camel_ability(camel: 'BattlePet', player: 'BattlePlayerState'):
         # If the camel has something behind it or is not yet the last pet
         if player.battle_pets[-1] != camel:
             buff_pet = player.battle_pets[player.battle_pets.index(camel) + 1]
@@ -187,7 +188,7 @@ class PetAbilities:
 
     @staticmethod
     # After attack, deal 1 damage to the friend behind L times
-    def elephant_ability(elephant: 'PetState', player: 'PlayerState'):
+    def elephant_ability(elephant: 'BattlePet', player: 'BattlePlayerState'):
         # Nothing will happen if it has no pet behind the elephant
         # Also covers case where it is just the elephant
         if player.battle_pets[-1] == elephant: return
@@ -207,13 +208,13 @@ class PetAbilities:
 
     @staticmethod
     # When a friend is summoned, gain 2L attack and L health until end of battle (stacking and unlimited)
-    def dog_ability(dog: 'PetState', player: 'PlayerState'):
+    def dog_ability(dog: 'BattlePet', player: 'BattlePlayerState'):
         dog.change_health(dog.get_level())
         dog.change_attack(2 * dog.get_level())
 
     @staticmethod
     # On faint, summon 2 rams with 2L health and attack
-    def sheep_ability(sheep: 'PetState', player: 'PlayerState'):
+    def sheep_ability(sheep: 'BattlePet', player: 'BattlePlayerState'):
         stat = 2 * sheep.get_level()
         ram_a = player.create_pet_to_summon(PetType.RAM, stat, stat)
         ram_b = player.create_pet_to_summon(PetType.RAM, stat, stat)
@@ -221,7 +222,7 @@ class PetAbilities:
 
     @staticmethod
     # Battle round start -> Reduce the highest health enemy's health by 0.33*L
-    def skunk_ability(skunk: 'PetState', player: 'PlayerState'):
+    def skunk_ability(skunk: 'BattlePet', player: 'BattlePlayerState'):
         highest_health_pet = max(player.opponent.battle_pets, key = lambda pet: pet.get_health())
         percent = 0.33 * skunk.get_level()
         reduce_amount = int(highest_health_pet.get_health() * percent)
@@ -229,7 +230,7 @@ class PetAbilities:
 
     @staticmethod
     # Knockout -> Gain 3L health and attack
-    def hippo_ability(hippo: 'PetState', player: 'PlayerState'):
+    def hippo_ability(hippo: 'BattlePet', player: 'BattlePlayerState'):
         hippo.change_health(3 * hippo.get_level())
         hippo.change_attack(3 * hippo.get_level())
 
@@ -248,9 +249,9 @@ class PetAbilities:
 
     @staticmethod
     # On hurt -> Deal 3L damage to one random enemy
-    def blowfish_ability(blowfish: 'PetState', player: 'PlayerState'):
+    def blowfish_ability(blowfish: 'BattlePet', player: 'BattlePlayerState'):
         if len(player.opponent.battle_pets) == 0: return
-        target_pet = choice(player.opponent.battle_pets)
+        target_pet = player.rng.choice(player.opponent.battle_pets)
         blowfish.damage_enemy_with_ability(3 * blowfish.get_level(), target_pet)
 
     @staticmethod
@@ -268,7 +269,7 @@ class PetAbilities:
         if len(strong_pets) == 0: return
         
         num_choose = 2 if len(strong_pets) >= 2 else 1
-        pets_to_upgrade = sample(strong_pets, num_choose)
+        pets_to_upgrade = player.rng.sample(strong_pets, num_choose)
         for pet in pets_to_upgrade:
             pet.perm_increase_health(penguin.get_level())
             pet.perm_increase_attack(penguin.get_level())
@@ -0,0 +1,53 @@
+from typing import TYPE_CHECKING
+
+from engine.config.foodtype import FoodType
+from engine.game.battleeventtype import BattleEventType
+from engine.game.battlepet import GARLIC, MEAT_BONE, BattlePet
+
+if TYPE_CHECKING:
+    from engine.game.battlerecorder import BattleRecorder
+
+
+# A battle pet that reports what happens to it to the battle's recorder.
+# BattleRecorder switches pets to this class, so battles that aren't recorded
+# never run any of this
+class RecordingBattlePet(BattlePet):
+    __slots__ = ()
+
+    def damage_enemy_with_attack(self, enemy_pet: 'BattlePet'):
+        recorder = self._get_recorder()
+        recorder.record(BattleEventType.ATTACK, self, enemy_pet, self._attack + self.get_bonus_attack())
+        if self.carried_food is MEAT_BONE:
+            recorder.record(BattleEventType.FOOD, self, a = FoodType.MEAT_BONE.value)
+
+        super().damage_enemy_with_attack(enemy_pet)
+
+    def use_ability(self):
+        self._get_recorder().record(BattleEventType.ABILITY, self, a = self.pet_config.ABILITY_TYPE.value)
+        super().use_ability()
+
+    def change_health(self, amount: int):
+        super().change_health(amount)
+        self._get_recorder().record(BattleEventType.STATS, self, a = self._health, b = self._attack)
+
+    def change_attack(self, amount: int):
+        super().change_attack(amount)
+        self._get_recorder().record(BattleEventType.STATS, self, a = self._health, b = self._attack)
+
+    def _take_damage(self, amount: int):
+        if self._health <= 0: return
+
+        recorder = self._get_recorder()
+        damage = amount
+        if self.carried_food is GARLIC:
+            recorder.record(BattleEventType.FOOD, self, a = FoodType.GARLIC.value)
+            damage = max(amount - 2, 1)
+        recorder.record(BattleEventType.DAMAGE, self, a = damage, b = max(self._health - damage, 0))
+
+        super()._take_damage(amount)
+
+        if self._health <= 0:
+            recorder.record(BattleEventType.FAINT, self)
+
+    def _get_recorder(self) -> 'BattleRecorder':
+        return self.player.battle.recorder
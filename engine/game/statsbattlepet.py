@@ -0,0 +1,48 @@
+from typing import TYPE_CHECKING
+
+from engine.game.battlepet import BattlePet
+
+if TYPE_CHECKING:
+    from engine.game.battlestats import BattleStats
+
+
+# A battle pet that counts what it does in the battle's stats.
+# BattleStats switches pets to this class, so battles without
+# stats never run any of this
+class StatsBattlePet(BattlePet):
+    __slots__ = ()
+
+    def damage_enemy_with_attack(self, enemy_pet: 'BattlePet'):
+        stats = self._get_stats()
+        stats.record_attack(self)
+
+        health = enemy_pet._health
+        super().damage_enemy_with_attack(enemy_pet)
+        self._record_damage(enemy_pet, health)
+
+    def damage_enemy_with_ability(self, attack, enemy_pet: 'BattlePet'):
+        health = enemy_pet._health
+        super().damage_enemy_with_ability(attack, enemy_pet)
+        self._record_damage(enemy_pet, health)
+
+    def use_ability(self):
+        self._get_stats().record_ability(self)
+        super().use_ability()
+
+    def _take_damage(self, amount: int):
+        was_alive = self._health > 0
+        super()._take_damage(amount)
+
+        if was_alive and self._health <= 0:
+            self._get_stats().record_faint(self)
+
+    # Only counts the health the enemy had left, and not hits on its own side (ex: Hedgehog)
+    def _record_damage(self, enemy_pet: 'BattlePet', health: int):
+        if enemy_pet.player is self.player: return
+
+        damage = max(health, 0) - max(enemy_pet._health, 0)
+        if damage > 0:
+            self._get_stats().record_damage(self, damage)
+
+    def _get_stats(self) -> 'BattleStats':
+        return self.player.battle.stats
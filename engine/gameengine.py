@@ -1,17 +1,23 @@
+from typing import TYPE_CHECKING, Optional
+
 from engine.config.gameconfig import MAX_ROUNDS
-from engine.game.battle import Battle
+from engine.game.battlestagehelper import BattleStageHelper
 from engine.game.buystagehelper import BuyStageHelper
 from engine.output.gamelog import GameLog
 from engine.output.outputhandler import OutputHandler
 from engine.state.gamestate import GameState
 
+if TYPE_CHECKING:
+    from engine.state.playerstate import PlayerState
+
 
 class GameEngine:
-    def __init__(self):
-        self.state = GameState()
+    def __init__(self, seed: Optional[int] = None, battle_workers: int = 0):
+        self.state = GameState(seed)
         self.log = GameLog(self.state)
         self.output_handler = OutputHandler(self.state, self.log)
         self.buy_stage_helper = BuyStageHelper(self.state, self.log, self.output_handler)
+        self.battle_stage_helper = BattleStageHelper(self.state, self.log, battle_workers)
 
     def run(self):
         while not self.state.is_game_over():
@@ -22,19 +28,21 @@ class GameEngine:
             self.state.start_new_round()
             self.log.write_start_state_logs()
             players = self.state.get_alive_players()
+            self.battle_stage_helper.start_round(players)
 
+            # All players buy at the same time. A player's lineup is final once their buy round
+            # end abilities have run, so their battles can start while others are still buying
             self.log.init_buy_stage_log()
-            for player in players:
-                self.buy_stage_helper.run(player)
+            self.buy_stage_helper.run(players, self._end_buy_stage)
 
-            self.state.start_battle_stage()
             self.log.init_battle_stage_log()
-            for player in players:
-                battle = Battle(player, player.challenger, self.state, self.log)
-                player.battle = battle
-                player.challenger.battle = battle
-                battle.run()
+            self.battle_stage_helper.run()
 
             self.state.end_round()
 
+        self.battle_stage_helper.shutdown()
         self.output_handler.terminate_success(self.state.get_player_ranking())
+
+    def _end_buy_stage(self, player: 'PlayerState'):
+        player.start_battle_stage()
+        self.battle_stage_helper.lineup_ready(player)
@@ -1,7 +1,10 @@
+import errno
 from json import dumps, loads
-from signal import SIGALRM, alarm, signal
-from time import time
-from typing import TYPE_CHECKING
+import os
+from select import select
+from selectors import EVENT_READ, DefaultSelector
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 from engine.config.gameconfig import NUM_PLAYERS
 from engine.config.ioconfig import CORE_DIRECTORY, CUMULATIVE_MAX_TIME, OPEN_PIPE_TIMEOUT_SECONDS, READ_PIPE_TIMEOUT_SECONDS, WRITE_PIPE_TIMEOUT_SECONDS
@@ -15,80 +18,180 @@ if TYPE_CHECKING:
     from engine.state.gamestate import GameState
     from engine.state.playerstate import PlayerState
 
+# How often to check whether submissions have opened their end of the pipes
+OPEN_POLL_INTERVAL_SECONDS = 0.005
 
+# Most bytes read from a pipe at once. Moves are much smaller, so one read usually gets a whole move
+READ_CHUNK_SIZE = 4096
+
+
+# Talks to the submissions over their named pipes. The pipes are non-blocking and every
+# wait has a deadline on the monotonic clock, checked with select, so timeouts don't need
+# signals and any number of players can be waited on at once
 class InputHelper:
     def __init__(self, state: 'GameState', output_handler: 'OutputHandler'):
         self.state = state
         self.output_handler = output_handler
 
-        curr_player_num = 0
+        self.from_engine_pipes: List[int] = []
+        self.to_engine_pipes: List[int] = []
 
-        def open_pipe_timeout_handler(a, b):
-            self.output_handler.terminate_fail(TerminationType.OPEN_TIMEOUT, self.state.players[curr_player_num])
-        signal(SIGALRM, open_pipe_timeout_handler)
+        # Players that have been sent a view and haven't replied yet, with their deadlines
+        self.selector = DefaultSelector()
+        self._deadlines: Dict[int, Tuple[float, 'TerminationType']] = {}
+        self._sent_times: Dict[int, float] = {}
 
-        self.from_engine_pipes = []
-        self.to_engine_pipes = []
+        # When each player's move arrived. Players are only charged from when their view was
+        # sent until then, so time the engine spends on other players or battles isn't theirs
+        self._arrival_times: Dict[int, float] = {}
 
-        for curr_player_num in range(NUM_PLAYERS):
-            alarm(OPEN_PIPE_TIMEOUT_SECONDS) # Enable timer
-            start = time()
-            self.from_engine_pipes.append(open(self._get_pipe_path(curr_player_num, from_engine = True), 'w'))
-            self.to_engine_pipes.append(open(self._get_pipe_path(curr_player_num, from_engine = False), 'r'))
-            end = time()
-            alarm(0) # Disable timer
+        # The last time every pipe was checked. Anything read later arrived after this
+        self._last_checked = monotonic()
 
-            self._add_cumulative_time(self.state.players[curr_player_num], start, end)
+        # Bytes read from each player that aren't part of a move yet
+        self._buffers: List[bytearray] = [bytearray() for _ in range(NUM_PLAYERS)]
 
-    def get_player_input(self, player: 'PlayerState', remaining_moves: int) -> 'PlayerInput':
-        self._send_view_to_player(player, self.state.get_view(player, remaining_moves))
-        input = self._receive_input_from_player(player)
+        self._open_pipes()
 
-        valid, reason = InputValidator.validate_input(input, player, self.state)
-        if not valid:
-            self.output_handler.terminate_fail(TerminationType.INVALID_MOVE, player, reason = reason)
+    # Sends the player their view and starts waiting for their move
+    def send_view(self, player: 'PlayerState', remaining_moves: int):
+        self._send_view_to_player(player, self.state.get_view(player, remaining_moves))
 
-        return input
+        self._sent_times[player.player_num] = monotonic()
+        self._deadlines[player.player_num] = self._get_deadline(player, self._sent_times[player.player_num], READ_PIPE_TIMEOUT_SECONDS, TerminationType.READ_TIMEOUT)
+        self.selector.register(self.to_engine_pipes[player.player_num], EVENT_READ, player)
+
+    # Waits for the first move from any player that was sent a view, and returns it once
+    # it has been validated. Players that miss their deadline fail with READ_TIMEOUT, or
+    # CUMULATIVE_TIMEOUT if they run out of their total time first
+    def get_next_input(self) -> Tuple['PlayerState', 'PlayerInput']:
+        while True:
+            # Moves that came in while the engine was busy (ex: with a battle) are picked up
+            # before any deadline is checked. They arrived some time after the last check
+            checked = monotonic()
+            for key, _ in self.selector.select(0):
+                self._read_from_player(key.data, self._last_checked)
+            self._last_checked = checked
+
+            # A move can also be buffered if it came in the same read as the player's previous move
+            for player_num in self._deadlines:
+                if b";" in self._buffers[player_num]:
+                    player = self.state.players[player_num]
+                    input = self._get_input(player)
+
+                    valid, reason = InputValidator.validate_input(input, player, self.state)
+                    if not valid:
+                        self.output_handler.terminate_fail(TerminationType.INVALID_MOVE, player, reason = reason)
+
+                    return player, input
+
+            now = monotonic()
+            player_num = min(self._deadlines, key = lambda player_num: self._deadlines[player_num][0])
+            deadline, termination_type = self._deadlines[player_num]
+            if deadline <= now:
+                self._terminate_timeout(self.state.players[player_num], termination_type)
+
+            ready = self.selector.select(deadline - now)
+            self._last_checked = monotonic()
+            for key, _ in ready:
+                self._read_from_player(key.data, self._last_checked)
 
     def _get_pipe_path(self, player_num, from_engine: bool) -> str:
         ending = "from_engine.pipe" if from_engine else "to_engine.pipe"
         return f"{CORE_DIRECTORY}/submission{player_num}/io/{ending}"
 
-    def _send_view_to_player(self, player: 'PlayerState', view: dict):
-        def write_pipe_timeout_handler(a, b):
-            self.output_handler.terminate_fail(TerminationType.WRITE_TIMEOUT, player)
-        signal(SIGALRM, write_pipe_timeout_handler)
+    # Returns when a wait that started at `start` has to end, and how the player fails if it does.
+    # A player that has used up most of their total time gets less than the timeout
+    def _get_deadline(self, player: 'PlayerState', start: float, timeout: float, termination_type: 'TerminationType') -> Tuple[float, 'TerminationType']:
+        remaining_time = CUMULATIVE_MAX_TIME - player.cumulative_time
+        if remaining_time < timeout:
+            return start + remaining_time, TerminationType.CUMULATIVE_TIMEOUT
+        return start + timeout, termination_type
+
+    # Submissions open their end of from_engine.pipe before to_engine.pipe. Opening the
+    # write end of a pipe without blocking fails until the reader is there, so every player
+    # is retried until they connect or their deadline passes. The read end can be opened
+    # straight away, and a submission that never writes to it fails its first read
+    def _open_pipes(self):
+        start = monotonic()
+        deadlines = {player_num: self._get_deadline(self.state.players[player_num], start, OPEN_PIPE_TIMEOUT_SECONDS, TerminationType.OPEN_TIMEOUT) for player_num in range(NUM_PLAYERS)}
+        from_engine_pipes: Dict[int, int] = {}
+
+        while len(from_engine_pipes) < NUM_PLAYERS:
+            for player_num in range(NUM_PLAYERS):
+                if player_num in from_engine_pipes: continue
+
+                try:
+                    from_engine_pipes[player_num] = os.open(self._get_pipe_path(player_num, from_engine = True), os.O_WRONLY | os.O_NONBLOCK)
+                except OSError as exception:
+                    if exception.errno != errno.ENXIO: raise
+
+                    if monotonic() >= deadlines[player_num][0]:
+                        self._terminate_timeout(self.state.players[player_num], deadlines[player_num][1])
+                    continue
+
+                self._add_cumulative_time(self.state.players[player_num], start, monotonic())
+
+            if len(from_engine_pipes) < NUM_PLAYERS:
+                sleep(OPEN_POLL_INTERVAL_SECONDS)
+
+        for player_num in range(NUM_PLAYERS):
+            self.from_engine_pipes.append(from_engine_pipes[player_num])
+            self.to_engine_pipes.append(os.open(self._get_pipe_path(player_num, from_engine = False), os.O_RDONLY | os.O_NONBLOCK))
 
+    def _send_view_to_player(self, player: 'PlayerState', view: dict):
         json = dumps(view)
         json += ";"
 
-        alarm(WRITE_PIPE_TIMEOUT_SECONDS) # Enable timer
-        start = time()
-        self.from_engine_pipes[player.player_num].write(json)
-        self.from_engine_pipes[player.player_num].flush()
-        end = time()
-        alarm(0) # Disable timer
-
-        self._add_cumulative_time(player, start, end)
+        pipe = self.from_engine_pipes[player.player_num]
+        start = monotonic()
+        deadline, termination_type = self._get_deadline(player, start, WRITE_PIPE_TIMEOUT_SECONDS, TerminationType.WRITE_TIMEOUT)
+
+        # Views bigger than the pipe's buffer are written as the submission reads them
+        data = memoryview(json.encode())
+        while len(data) > 0:
+            try:
+                data = data[os.write(pipe, data):]
+            except BlockingIOError:
+                remaining_time = deadline - monotonic()
+                if remaining_time <= 0 or len(select([], [pipe], [], remaining_time)[1]) == 0:
+                    self._terminate_timeout(player, termination_type)
+            except BrokenPipeError:
+                self.output_handler.terminate_fail(TerminationType.WRITE_TIMEOUT, player, reason = "Your submission closed its pipe from the engine")
+
+        self._add_cumulative_time(player, start, monotonic())
+
+    # Adds whatever the player has sent so far to their buffer, and notes when their move
+    # arrived once its ";" is read. Nothing more is read while a whole move is buffered, so
+    # a submission that exits straight after its last move doesn't fail before it's taken
+    def _read_from_player(self, player: 'PlayerState', arrival_time: float):
+        if b";" in self._buffers[player.player_num]: return
 
-    def _receive_input_from_player(self, player: 'PlayerState') -> 'PlayerInput':
-        def read_pipe_timeout_handler(a, b):
-            self.output_handler.terminate_fail(TerminationType.READ_TIMEOUT, player)
-        signal(SIGALRM, read_pipe_timeout_handler)
-
-        json = ''
-
-        alarm(READ_PIPE_TIMEOUT_SECONDS) # Enable timer
-        start = time()
-        while not json or json[-1] != ';':
-            json += self.to_engine_pipes[player.player_num].read(1)
-        end = time()
-        alarm(0) # Disable timer
-
-        self._add_cumulative_time(player, start, end)
-
-        # Remove ";"
-        json = json[:-1]
+        try:
+            data = os.read(self.to_engine_pipes[player.player_num], READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+
+        if data == b"":
+            self.output_handler.terminate_fail(TerminationType.READ_TIMEOUT, player, reason = "Your submission closed its pipe to the engine")
+
+        self._buffers[player.player_num] += data
+        if b";" in data and player.player_num in self._sent_times and player.player_num not in self._arrival_times:
+            self._arrival_times[player.player_num] = max(arrival_time, self._sent_times[player.player_num])
+
+    # Takes the player's move, which ends with ";", out of their buffer. Anything after
+    # the ";" is kept for their next move
+    def _get_input(self, player: 'PlayerState') -> 'PlayerInput':
+        self.selector.unregister(self.to_engine_pipes[player.player_num])
+        del self._deadlines[player.player_num]
+        # A move that was sent before the player's view (ex: with their previous move) takes no time
+        sent_time = self._sent_times.pop(player.player_num)
+        self._add_cumulative_time(player, sent_time, self._arrival_times.pop(player.player_num, sent_time))
+
+        buffer = self._buffers[player.player_num]
+        end = buffer.index(b";")
+        json = bytes(buffer[:end])
+        del buffer[:end + 1]
 
         try:
             input_dict = loads(json)
@@ -97,7 +200,16 @@ class InputHelper:
         except Exception as exception:
             self.output_handler.terminate_fail(TerminationType.CANNOT_PARSE_INPUT, player, exception = exception)
 
+    def _terminate_timeout(self, player: 'PlayerState', termination_type: 'TerminationType'):
+        if termination_type == TerminationType.CUMULATIVE_TIMEOUT:
+            self._terminate_cumulative_timeout(player)
+        else:
+            self.output_handler.terminate_fail(termination_type, player)
+
     def _add_cumulative_time(self, player: 'PlayerState', start: float, end: float):
         player.cumulative_time += (end - start)
         if player.cumulative_time > CUMULATIVE_MAX_TIME:
-            self.output_handler.terminate_fail(TerminationType.CUMULATIVE_TIMEOUT, player, reason=f"Throughout the game, your submission took longer than {CUMULATIVE_MAX_TIME}s to play moves")
+            self._terminate_cumulative_timeout(player)
+
+    def _terminate_cumulative_timeout(self, player: 'PlayerState'):
+        self.output_handler.terminate_fail(TerminationType.CUMULATIVE_TIMEOUT, player, reason=f"Throughout the game, your submission took longer than {CUMULATIVE_MAX_TIME}s to play moves")
@@ -0,0 +1,314 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from engine.config.foodtype import FoodType
+from engine.config.gameconfig import MAX_BATTLE_TURNS, PET_POSITIONS
+from engine.config.petconfig import PET_CONFIG, PetConfig
+from engine.config.pettype import PetType
+from engine.game.abilitytype import BUY_STAGE_ABILITY_TYPES
+from engine.sim.lineuppet import PET_TYPES, LineupPet
+from engine.sim.simulator import LineupDescription, Simulator
+
+# Outcome codes, from the perspective of lineup A
+WIN = 1
+TIE = 0
+LOSS = -1
+
+MAX_STAT = 50
+
+# Food codes
+NO_FOOD = 0
+HONEY = 1
+MEAT_BONE = 2
+GARLIC = 3
+
+FOOD_CODES = {
+    FoodType.HONEY: HONEY,
+    FoodType.MEAT_BONE: MEAT_BONE,
+    FoodType.GARLIC: GARLIC,
+}
+
+# Ability codes for the battle abilities the kernel handles. Pets whose ability
+# never fires during a battle (ex: Pig, Swan, Giraffe) use NO_ABILITY
+NO_ABILITY = 0
+PEACOCK = 1
+KANGAROO = 2
+HIPPO = 3
+HORSE = 4
+DOG = 5
+
+ABILITY_CODES = {
+    PetType.PEACOCK: PEACOCK,
+    PetType.KANGAROO: KANGAROO,
+    PetType.HIPPO: HIPPO,
+    PetType.HORSE: HORSE,
+    PetType.DOG: DOG,
+}
+
+# Base stats, ability codes and kernel support of every pet, indexed by PetType value
+NUM_PET_TYPES = max(pet_type.value for pet_type in PetType) + 1
+PET_BASE_HEALTH = np.zeros(NUM_PET_TYPES, dtype = np.int16)
+PET_BASE_ATTACK = np.zeros(NUM_PET_TYPES, dtype = np.int16)
+PET_ABILITY_CODES = np.zeros(NUM_PET_TYPES, dtype = np.int16)
+PET_SUPPORTED = np.zeros(NUM_PET_TYPES, dtype = bool)
+for pet_type, pet_config in PET_CONFIG.items():
+    # Summoned pets (ex: Ram) get their stats from the pet that summons them, so they have no base stats
+    PET_BASE_HEALTH[pet_type.value] = pet_config.BASE_HEALTH or 0
+    PET_BASE_ATTACK[pet_type.value] = pet_config.BASE_ATTACK or 0
+    PET_ABILITY_CODES[pet_type.value] = ABILITY_CODES.get(pet_type, NO_ABILITY)
+    PET_SUPPORTED[pet_type.value] = pet_type in ABILITY_CODES or pet_config.ABILITY_TYPE in BUY_STAGE_ABILITY_TYPES
+
+
+# Steps many independent battles in lockstep with NumPy.
+# Every battle is stored as rows of (B, 2, PET_POSITIONS) arrays, where side 0 is
+# lineup A and side 1 is lineup B, and the front pet is at position 0.
+# The kernel handles lineups whose pets have no battle ability or one of the
+# abilities in ABILITY_CODES, and any carried food. None of these are random, so the
+# outcome of each battle is exact. Battles with any other pet are masked out of the
+# kernel and run by the object model instead
+class BatchBattle:
+    @staticmethod
+    def is_supported(pet: 'LineupPet') -> bool:
+        return pet.pet_type in ABILITY_CODES or pet.pet_config.ABILITY_TYPE in BUY_STAGE_ABILITY_TYPES
+
+    def __init__(self, matchups: List[Tuple['LineupDescription', 'LineupDescription']]):
+        self.matchups = matchups
+        self.num_battles = len(matchups)
+
+        # Lineup search battles the same lineups many times, so each distinct lineup
+        # is only encoded once and the battles index into the encoded lineups
+        lineup_indices: Dict[int, int] = {}
+        lineups: List['LineupDescription'] = []
+        battle_lineups = []
+        for lineup_a, lineup_b in matchups:
+            for lineup in (lineup_a, lineup_b):
+                if id(lineup) not in lineup_indices:
+                    lineup_indices[id(lineup)] = len(lineups)
+                    lineups.append(lineup)
+            battle_lineups += (lineup_indices[id(lineup_a)], lineup_indices[id(lineup_b)])
+
+        battle_lineups = np.array(battle_lineups, dtype = np.intp).reshape(self.num_battles, 2)
+        lineup_supported, codes = self._encode_lineups(lineups)
+
+        # Battles the kernel can't run
+        self.unsupported = ~lineup_supported[battle_lineups].all(axis = 1)
+
+        self.health = codes[battle_lineups, 0]
+        self.attack = codes[battle_lineups, 1]
+        self.level = codes[battle_lineups, 2]
+        self.ability = codes[battle_lineups, 3].astype(np.int8)
+        self.food = codes[battle_lineups, 4].astype(np.int8)
+
+    # Returns the outcome code of every battle. The seed is only used by the
+    # battles that fall back to the object model
+    def run(self, seed: Optional[int] = None) -> np.ndarray:
+        outcomes = self._run_kernel()
+
+        rng = np.random.default_rng(seed)
+        for battle in np.flatnonzero(self.unsupported):
+            lineup_a, lineup_b = self.matchups[battle]
+            battle_seed = int(rng.integers(2 ** 63))
+            player_lost = Simulator(lineup_a, lineup_b, battle_seed).run_battle()
+            outcomes[battle] = TIE if player_lost is None else (LOSS if player_lost else WIN)
+
+        return outcomes
+
+    # Returns whether the kernel supports each lineup, and their health, attack, level, ability
+    # and food codes as a (lineups, 5, PET_POSITIONS) array, front pet first. Parsing pets one by
+    # one would take longer than the kernel, so each pet's fields are only collected in one pass,
+    # names are looked up once per distinct name, and the rest is done on whole arrays
+    def _encode_lineups(self, lineups: List['LineupDescription']) -> Tuple[np.ndarray, np.ndarray]:
+        # One list per field, since a tuple per pet would keep the garbage collector busy
+        pet_lineups = []
+        pet_types = []
+        health = []
+        attack = []
+        level = []
+        foods = []
+        for index, lineup in enumerate(lineups):
+            if len(lineup) > PET_POSITIONS:
+                raise ValueError(f"A lineup has at most {PET_POSITIONS} pets but {len(lineup)} were given")
+
+            for pet in lineup:
+                if pet is None: continue
+
+                pet_lineups.append(index)
+                if isinstance(pet, LineupPet):
+                    # Enum members are slow to hash and their values are slow to get, so the
+                    # pet config and the food's _value_ are used instead
+                    pet_types.append(pet.pet_config)
+                    health.append(pet.health)
+                    attack.append(pet.attack)
+                    level.append(pet.level)
+                    foods.append(pet.carried_food._value_ if pet.carried_food is not None else None)
+                else:
+                    pet_types.append(pet["type"])
+                    health.append(pet.get("health"))
+                    attack.append(pet.get("attack"))
+                    level.append(pet.get("level", 1))
+                    foods.append(pet.get("carried_food"))
+
+        lineup_supported = np.ones(len(lineups), dtype = bool)
+        codes = np.zeros((len(lineups), 5, PET_POSITIONS), dtype = np.int16)
+        if len(pet_lineups) == 0:
+            return lineup_supported, codes
+
+        type_values = {pet_type: self._get_pet_type_value(pet_type) for pet_type in set(pet_types)}
+        food_codes = {food: self._get_food_code(food) for food in set(foods)}
+        pet_types = np.array([type_values[pet_type] for pet_type in pet_types], dtype = np.intp)
+        foods = np.array([food_codes[food] for food in foods], dtype = np.int16)
+
+        # Missing stats (None) become NaN, and default to the base stats
+        health = np.array(health, dtype = float)
+        health = np.where(np.isnan(health), PET_BASE_HEALTH[pet_types], health).astype(np.int16)
+        attack = np.array(attack, dtype = float)
+        attack = np.where(np.isnan(attack), PET_BASE_ATTACK[pet_types], attack).astype(np.int16)
+
+        level = np.array(level, dtype = np.int16)
+        invalid_levels = np.flatnonzero((level < 1) | (level > 3))
+        if len(invalid_levels) > 0:
+            pet = invalid_levels[0]
+            raise ValueError(f"Invalid level {level[pet]} for {PetType(pet_types[pet]).name}")
+
+        # Empty slots and dead pets are removed at the start of a battle
+        alive = health > 0
+        pet_lineups = np.array(pet_lineups, dtype = np.intp)[alive]
+        pet_types = pet_types[alive]
+
+        # The pets are in lineup order, so a pet's position is how many pets of its lineup come before it
+        positions = np.arange(len(pet_lineups)) - np.searchsorted(pet_lineups, pet_lineups)
+
+        codes[pet_lineups, 0, positions] = health[alive]
+        codes[pet_lineups, 1, positions] = attack[alive]
+        codes[pet_lineups, 2, positions] = level[alive]
+        codes[pet_lineups, 3, positions] = PET_ABILITY_CODES[pet_types]
+        codes[pet_lineups, 4, positions] = foods[alive]
+        lineup_supported[pet_lineups[~PET_SUPPORTED[pet_types]]] = False
+        return lineup_supported, codes
+
+    def _get_pet_type_value(self, pet_type: Union['PetConfig', str, 'PetType']) -> int:
+        return PET_TYPES[pet_type].value if isinstance(pet_type, PetConfig) else LineupPet.get_pet_type(pet_type).value
+
+    def _get_food_code(self, food: Optional[Union[int, str, 'FoodType']]) -> int:
+        if food is None:
+            return NO_FOOD
+        return FOOD_CODES.get(FoodType(food) if isinstance(food, int) else LineupPet.get_food_type(food), NO_FOOD)
+
+    def _run_kernel(self) -> np.ndarray:
+        outcomes = np.full(self.num_battles, TIE, dtype = np.int8)
+
+        # Only the battles that are still running are kept in the working arrays
+        battles = np.flatnonzero(~self.unsupported)
+        health = self.health[battles]
+        attack = self.attack[battles]
+        level = self.level[battles]
+        ability = self.ability[battles]
+        food = self.food[battles]
+
+        # Like Battle, battles that stop making progress or run past MAX_BATTLE_TURNS are ties
+        stalled = np.zeros(len(battles), dtype = bool)
+        for turn in range(MAX_BATTLE_TURNS + 1):
+            running = (health[:, 0, 0] > 0) & (health[:, 1, 0] > 0) & ~stalled
+            if not running.all():
+                finished = ~running & ~stalled
+                outcomes[battles[finished]] = self._get_outcomes(health[finished])
+
+                battles = battles[running]
+                health = health[running]
+                attack = attack[running]
+                level = level[running]
+                ability = ability[running]
+                food = food[running]
+
+            if len(battles) == 0 or turn == MAX_BATTLE_TURNS:
+                break
+
+            # Fainted honey pets are replaced by bees, which can have the same stats but never carry food
+            previous_health = health.copy()
+            previous_attack = attack.copy()
+            previous_food = food.copy()
+            self._run_attack_turn(health, attack, level, ability, food)
+            stalled = (
+                (health == previous_health).all(axis = (1, 2))
+                & (attack == previous_attack).all(axis = (1, 2))
+                & (food == previous_food).all(axis = (1, 2))
+            )
+
+        return outcomes
+
+    def _get_outcomes(self, health: np.ndarray) -> np.ndarray:
+        alive_a = health[:, 0, 0] > 0
+        alive_b = health[:, 1, 0] > 0
+
+        outcomes = np.full(len(health), TIE, dtype = np.int8)
+        outcomes[alive_a & ~alive_b] = WIN
+        outcomes[~alive_a & alive_b] = LOSS
+        return outcomes
+
+    def _run_attack_turn(self, health: np.ndarray, attack: np.ndarray, level: np.ndarray, ability: np.ndarray, food: np.ndarray):
+        front_food = food[:, :, 0]
+        front_ability = ability[:, :, 0]
+        front_level = level[:, :, 0]
+
+        # Both front pets hit each other at the same time
+        damage = attack[:, :, 0] + np.where(front_food == MEAT_BONE, 3, 0).astype(np.int16)
+        damage = damage[:, ::-1]
+        damage = np.where(front_food == GARLIC, np.maximum(damage - 2, 1), damage)
+
+        front_health = np.clip(health[:, :, 0] - damage, 0, MAX_STAT)
+        health[:, :, 0] = front_health
+
+        died = front_health == 0
+        knockout = ~died & died[:, ::-1]
+
+        # Friend ahead attacked (the second pet, even if the front pet died)
+        kangaroo = (ability[:, :, 1] == KANGAROO) & (health[:, :, 1] > 0)
+        kangaroo_buff = np.where(kangaroo, level[:, :, 1], 0).astype(np.int16)
+        health[:, :, 1] = np.minimum(health[:, :, 1] + kangaroo_buff, MAX_STAT)
+        attack[:, :, 1] = np.minimum(attack[:, :, 1] + kangaroo_buff, MAX_STAT)
+
+        # Knockout
+        hippo_buff = np.where(knockout & (front_ability == HIPPO), 3 * front_level, 0).astype(np.int16)
+        health[:, :, 0] = np.minimum(health[:, :, 0] + hippo_buff, MAX_STAT)
+        attack[:, :, 0] = np.minimum(attack[:, :, 0] + hippo_buff, MAX_STAT)
+
+        # Hurt (a hit always counts, even for 0 damage)
+        peacock_buff = np.where(front_ability == PEACOCK, 4 * front_level, 0).astype(np.int16)
+        attack[:, :, 0] = np.minimum(attack[:, :, 0] + peacock_buff, MAX_STAT)
+
+        # Fainted pets carrying honey are replaced by a bee
+        bee = died & (front_food == HONEY)
+        if bee.any():
+            self._summon_bees(bee, health, attack, level, ability, food)
+
+        # Remove the fainted front pets that weren't replaced
+        removed = died & ~bee
+        if removed.any():
+            for array in (health, attack, level, ability, food):
+                shifted = np.zeros_like(array)
+                shifted[:, :, :-1] = array[:, :, 1:]
+                array[removed] = shifted[removed]
+
+    def _summon_bees(self, bee: np.ndarray, health: np.ndarray, attack: np.ndarray, level: np.ndarray, ability: np.ndarray, food: np.ndarray):
+        health[:, :, 0] = np.where(bee, 1, health[:, :, 0])
+        attack[:, :, 0] = np.where(bee, 1, attack[:, :, 0])
+        level[:, :, 0] = np.where(bee, 1, level[:, :, 0])
+        ability[:, :, 0] = np.where(bee, NO_ABILITY, ability[:, :, 0])
+        food[:, :, 0] = np.where(bee, NO_FOOD, food[:, :, 0])
+
+        # Friend summoned. The bee's side has no other dead pets, so every other pet is alive
+        friends = bee[:, :, None] & (health > 0)
+        friends[:, :, 0] = False
+
+        horse_buff = np.where(friends & (ability == HORSE), level, 0).sum(axis = 2).astype(np.int16)
+        attack[:, :, 0] = np.minimum(attack[:, :, 0] + horse_buff, MAX_STAT)
+
+        dog = friends & (ability == DOG)
+        health[:] = np.where(dog, np.minimum(health + level, MAX_STAT), health)
+        attack[:] = np.where(dog, np.minimum(attack + 2 * level, MAX_STAT), attack)
+
+
+# Battles every (lineup A, lineup B) matchup once and returns the outcome code for each lineup A
+def simulate_batch(matchups: List[Tuple['LineupDescription', 'LineupDescription']], seed: Optional[int] = None) -> np.ndarray:
+    return BatchBattle(matchups).run(seed)
@@ -0,0 +1,235 @@
+from argparse import ArgumentParser
+import json
+import os
+import platform
+import sys
+from time import perf_counter
+import tracemalloc
+from typing import List, Optional
+
+from engine.config.foodtype import FoodType
+from engine.config.petconfig import PET_CONFIG
+from engine.sim.exactsolver import ExactSolver
+from engine.sim.lineuppet import LineupPet
+from engine.sim.simulationresult import SimulationResult
+from engine.sim.simulator import Simulator
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.json")
+
+# The report that runs on the default corpus are compared with. Save a new one with --save
+# when the engine gets faster on purpose, or to measure against another machine
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Bump when scenarios change, so reports from different corpora aren't compared
+CORPUS_VERSION = 1
+
+# Foods that are still on a pet when a battle starts
+CARRIED_FOOD_TYPES = [FoodType.HONEY, FoodType.MEAT_BONE, FoodType.GARLIC]
+
+DEFAULT_REPEATS = 5
+DEFAULT_MAX_REGRESSION = 0.1
+
+
+# Measures battle speed on the scenario corpus (engine/sim/scenarios.json). Every scenario
+# has two lineups, a seed and the outcome counts of the corpus' n battles, so a run also
+# checks that the engine still plays the same battles. For every scenario, the report has:
+#   - battles_per_second: the best of `repeats` runs of n battles, like Simulator.run
+#   - setup_us: creating the Simulator, once per scenario
+#   - start_us and turns_us: time per battle in Battle.start_battle (copying the lineups and
+#     battle round start) and in the attack turns
+#   - peak_bytes: peak memory traced by tracemalloc during a battle, on a separate run
+#   - solver_matches: whether the exact solver's probabilities agree with the simulated
+#     outcomes, so engine changes that only the solver gets wrong are caught too
+class BattleBenchmark:
+    @staticmethod
+    def load_corpus(path: str = CORPUS_PATH) -> dict:
+        with open(path) as file:
+            corpus = json.load(file)
+
+        if corpus.get("version") != CORPUS_VERSION:
+            raise ValueError(f"Scenario corpus {path} has version {corpus.get('version')}, expected {CORPUS_VERSION}")
+        return corpus
+
+    # Returns the ability types and carried foods that no scenario has
+    @staticmethod
+    def get_missing_coverage(corpus: dict) -> List[str]:
+        ability_types = set()
+        foods = set()
+        for scenario in corpus["scenarios"]:
+            for pet in scenario["lineup_a"] + scenario["lineup_b"]:
+                if pet is None: continue
+                pet = LineupPet.from_dict(pet)
+                ability_types.add(pet.pet_config.ABILITY_TYPE)
+                foods.add(pet.carried_food)
+
+        missing = [ability_type.name for ability_type in {pet_config.ABILITY_TYPE for pet_config in PET_CONFIG.values()} - ability_types if ability_type is not None]
+        missing += [food_type.name for food_type in CARRIED_FOOD_TYPES if food_type not in foods]
+        return sorted(missing)
+
+    def __init__(self, corpus: Optional[dict] = None, repeats: int = DEFAULT_REPEATS, n: Optional[int] = None):
+        self.corpus = corpus if corpus is not None else BattleBenchmark.load_corpus()
+        self.repeats = repeats
+
+        # Outcomes are only checked with the corpus' n
+        self.n = n if n is not None else self.corpus["n"]
+
+    def run(self, names: Optional[List[str]] = None) -> dict:
+        scenarios = [scenario for scenario in self.corpus["scenarios"] if names is None or scenario["name"] in names]
+        report = {
+            "corpus_version": self.corpus["version"],
+            "python": platform.python_version(),
+            "n": self.n,
+            "scenarios": {}
+        }
+
+        total_battles = 0
+        total_time = 0.0
+        for scenario in scenarios:
+            scenario_report = self.run_scenario(scenario)
+            report["scenarios"][scenario["name"]] = scenario_report
+            total_battles += self.n
+            total_time += self.n / scenario_report["battles_per_second"]
+
+        report["battles_per_second"] = total_battles / total_time if total_time > 0 else 0.0
+        return report
+
+    def run_scenario(self, scenario: dict) -> dict:
+        best_time = float("inf")
+        result = None
+        for _ in range(self.repeats):
+            start = perf_counter()
+            simulator = Simulator(scenario["lineup_a"], scenario["lineup_b"], scenario["seed"])
+            setup_time = perf_counter() - start
+
+            start = perf_counter()
+            result = simulator.run(self.n)
+            best_time = min(best_time, perf_counter() - start)
+
+        start_time, turns_time = self._time_phases(scenario)
+        report = {
+            "battles_per_second": self.n / best_time,
+            "setup_us": setup_time * 1e6,
+            "start_us": start_time / self.n * 1e6,
+            "turns_us": turns_time / self.n * 1e6,
+            "peak_bytes": self._get_peak_bytes(scenario),
+            "result": result.get_view(),
+            "solver_matches": ExactSolver().solve(scenario["lineup_a"], scenario["lineup_b"]).is_consistent_with(result)
+        }
+        if self.n == self.corpus["n"]:
+            report["outcome_matches"] = report["result"] == scenario["expected"]
+        return report
+
+    # Times the two phases of every battle separately, on the same battles as Simulator.run
+    def _time_phases(self, scenario: dict) -> tuple:
+        simulator = Simulator(scenario["lineup_a"], scenario["lineup_b"], scenario["seed"])
+        battle = simulator.battle
+        start_time = 0.0
+        turns_time = 0.0
+        for _ in range(self.n):
+            start = perf_counter()
+            battle.start_battle()
+            middle = perf_counter()
+            battle._run_attack_turns()
+            end = perf_counter()
+
+            start_time += middle - start
+            turns_time += end - middle
+        return start_time, turns_time
+
+    # Returns the mean peak of memory allocated during a battle. Tracing slows battles
+    # down a lot, so it's done on a few battles apart from the timed runs
+    def _get_peak_bytes(self, scenario: dict, num_battles: int = 50) -> float:
+        simulator = Simulator(scenario["lineup_a"], scenario["lineup_b"], scenario["seed"])
+        simulator.run_battle()
+
+        total = 0
+        tracemalloc.start()
+        try:
+            for _ in range(num_battles):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                simulator.run_battle()
+                total += tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+        return total / num_battles
+
+
+# Returns a line for every scenario that got slower than the baseline by more than
+# max_regression (0.1 is 10%), or whose outcome changed
+def compare_reports(report: dict, baseline: dict, max_regression: float = DEFAULT_MAX_REGRESSION) -> List[str]:
+    if report["corpus_version"] != baseline["corpus_version"]:
+        return [f"The baseline is for corpus version {baseline['corpus_version']}, not {report['corpus_version']}"]
+
+    problems = []
+    for name, scenario_report in report["scenarios"].items():
+        if scenario_report.get("outcome_matches") is False:
+            problems.append(f"{name}: outcome changed to {scenario_report['result']}")
+        if scenario_report.get("solver_matches") is False:
+            problems.append(f"{name}: the exact solver disagrees with {scenario_report['result']}")
+
+        baseline_report = baseline["scenarios"].get(name)
+        if baseline_report is None: continue
+
+        ratio = scenario_report["battles_per_second"] / baseline_report["battles_per_second"]
+        if ratio < 1 - max_regression:
+            problems.append(f"{name}: {scenario_report['battles_per_second']:.0f} battles/s is {1 - ratio:.0%} slower than {baseline_report['battles_per_second']:.0f}")
+    return problems
+
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    print(f"{'scenario':<24}{'battles/s':>12}{'vs base':>9}{'start us':>10}{'turns us':>10}{'peak B':>9}  outcome")
+    for name, scenario_report in report["scenarios"].items():
+        change = ""
+        if baseline is not None and name in baseline["scenarios"]:
+            change = f"{scenario_report['battles_per_second'] / baseline['scenarios'][name]['battles_per_second'] - 1:+.0%}"
+
+        outcome = {True: "ok", False: "CHANGED", None: "-"}[scenario_report.get("outcome_matches")]
+        if scenario_report.get("solver_matches") is False:
+            outcome += ", SOLVER DISAGREES"
+        print(
+            f"{name:<24}{scenario_report['battles_per_second']:>12.0f}{change:>9}{scenario_report['start_us']:>10.1f}"
+            f"{scenario_report['turns_us']:>10.1f}{scenario_report['peak_bytes']:>9.0f}  {outcome}"
+        )
+    print(f"{'total':<24}{report['battles_per_second']:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog = "engine.sim.battlebenchmark")
+    parser.add_argument("--corpus", default = CORPUS_PATH, help = "scenario corpus to run")
+    parser.add_argument("--scenario", action = "append", help = "only run this scenario (can be repeated)")
+    parser.add_argument("--n", type = int, default = None, help = "battles per scenario (outcomes are only checked with the corpus' n)")
+    parser.add_argument("--repeats", type = int, default = DEFAULT_REPEATS, help = "timed runs per scenario, of which the fastest counts")
+    parser.add_argument("--baseline", help = "report to compare with (defaults to engine/sim/baseline.json for the default corpus)")
+    parser.add_argument("--no-baseline", action = "store_true", help = "don't compare with any report")
+    parser.add_argument("--max-regression", type = float, default = DEFAULT_MAX_REGRESSION, help = "slowdown from the baseline that fails the run (0.1 is 10%%)")
+    parser.add_argument("--save", help = "where to save this run's report, to use as a baseline later")
+    args = parser.parse_args()
+
+    corpus = BattleBenchmark.load_corpus(args.corpus)
+    missing = BattleBenchmark.get_missing_coverage(corpus)
+    if len(missing) > 0:
+        print(f"Not covered by the corpus: {', '.join(missing)}")
+
+    report = BattleBenchmark(corpus, args.repeats, args.n).run(args.scenario)
+
+    baseline_path = args.baseline
+    if baseline_path is None and args.corpus == CORPUS_PATH:
+        baseline_path = BASELINE_PATH
+    if args.no_baseline:
+        baseline_path = None
+
+    baseline = None
+    if baseline_path is not None:
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent = 4)
+
+    problems = compare_reports(report, baseline if baseline is not None else {"corpus_version": report["corpus_version"], "scenarios": {}}, args.max_regression)
+    for problem in problems:
+        print(problem)
+    sys.exit(1 if len(problems) > 0 else 0)
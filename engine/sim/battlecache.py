@@ -0,0 +1,172 @@
+from collections import OrderedDict
+from random import Random
+from typing import List, Optional
+
+from engine.config.pettype import PetType
+from engine.config.roundconfig import RoundConfig
+from engine.sim.lineuppet import LineupPet
+from engine.sim.simulationresult import SimulationResult
+from engine.sim.simulator import LineupDescription, Simulator
+
+# Pets whose battle abilities draw from the RNG
+RANDOM_BATTLE_PETS = [PetType.ANT, PetType.MOSQUITO, PetType.SPIDER, PetType.BLOWFISH]
+
+DEFAULT_MAX_SIZE = 100_000
+
+
+# Remembers the outcome distribution of matchups so repeated matchups aren't re-simulated.
+# Matchups are keyed by a canonical encoding of both lineups and the round's HEALTH_LOST,
+# and the least recently used matchup is evicted once the cache is full.
+# Matchups without random abilities always have the same outcome, so they are simulated
+# once and cached exactly. Random matchups cache their sampled distribution, which is
+# topped up when more samples are asked for than are cached
+class BattleCache:
+    @staticmethod
+    def get_lineup_key(lineup: List[Optional['LineupPet']]) -> tuple:
+        # Empty slots and dead pets are removed at the start of a battle, so they don't change the key
+        return tuple(pet.get_key() for pet in lineup if pet is not None and pet.health > 0)
+
+    @staticmethod
+    def is_deterministic(lineup: List[Optional['LineupPet']]) -> bool:
+        return all(pet.pet_type not in RANDOM_BATTLE_PETS for pet in lineup if pet is not None)
+
+    @staticmethod
+    def get_key(lineup_a: List[Optional['LineupPet']], lineup_b: List[Optional['LineupPet']], round: int = 0) -> tuple:
+        health_lost = RoundConfig.get_round_config(round).HEALTH_LOST
+        return (health_lost, BattleCache.get_lineup_key(lineup_a), BattleCache.get_lineup_key(lineup_b))
+
+    # Deterministic matchups only need one battle
+    @staticmethod
+    def get_num_samples(lineup_a: List[Optional['LineupPet']], lineup_b: List[Optional['LineupPet']], n: int) -> int:
+        if BattleCache.is_deterministic(lineup_a) and BattleCache.is_deterministic(lineup_b):
+            return 1
+        return n
+
+    # Keeps drawing new samples when a random matchup is topped up
+    @staticmethod
+    def get_sample_seed(seed: Optional[int], num_cached: int) -> Optional[int]:
+        return Random(f"{seed}:{num_cached}").getrandbits(64) if seed is not None else None
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._results: 'OrderedDict[tuple, SimulationResult]' = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Returns the outcome distribution for lineup A. Deterministic matchups are only run
+    # once, so their result has a single battle. Random matchups have at least n battles
+    def simulate(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, seed: Optional[int] = None, round: int = 0) -> 'SimulationResult':
+        pets_a = Simulator.parse_lineup(lineup_a)
+        pets_b = Simulator.parse_lineup(lineup_b)
+        key = BattleCache.get_key(pets_a, pets_b, round)
+        num_samples = BattleCache.get_num_samples(pets_a, pets_b, n)
+
+        result = self._get(key, num_samples)
+        if result is not None:
+            return result
+
+        # Results that have been handed out are never changed, so a top up makes a new one
+        new_result = SimulationResult()
+        if key in self._results:
+            new_result.merge(self._results[key])
+
+        num_cached = new_result.get_num_battles()
+        new_result.merge(Simulator(pets_a, pets_b, BattleCache.get_sample_seed(seed, num_cached)).run(num_samples - num_cached))
+
+        self._put(key, new_result)
+        return new_result
+
+    # Returns the cached result if it has enough battles, without simulating anything
+    def get(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, round: int = 0) -> Optional['SimulationResult']:
+        pets_a = Simulator.parse_lineup(lineup_a)
+        pets_b = Simulator.parse_lineup(lineup_b)
+        return self._get(BattleCache.get_key(pets_a, pets_b, round), BattleCache.get_num_samples(pets_a, pets_b, n))
+
+    # Like get, but also finds the matchup cached from lineup B's side, which is mirrored.
+    # Counts as a single lookup either way
+    def get_either_side(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, round: int = 0) -> Optional['SimulationResult']:
+        pets_a = Simulator.parse_lineup(lineup_a)
+        pets_b = Simulator.parse_lineup(lineup_b)
+        num_samples = BattleCache.get_num_samples(pets_a, pets_b, n)
+
+        result = self._find(BattleCache.get_key(pets_a, pets_b, round), num_samples)
+        if result is None:
+            mirrored = self._find(BattleCache.get_key(pets_b, pets_a, round), num_samples)
+            result = mirrored.get_mirrored() if mirrored is not None else None
+
+        self._count_lookup(result)
+        return result
+
+    # Returns how many battles of the matchup are cached, without counting a lookup
+    def get_num_cached(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', round: int = 0) -> int:
+        pets_a = Simulator.parse_lineup(lineup_a)
+        pets_b = Simulator.parse_lineup(lineup_b)
+        result = self._results.get(BattleCache.get_key(pets_a, pets_b, round))
+        return result.get_num_battles() if result is not None else 0
+
+    # Adds battles that were simulated elsewhere (ex: a top up from a worker process) to the cached ones
+    def add(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', result: 'SimulationResult', round: int = 0):
+        pets_a = Simulator.parse_lineup(lineup_a)
+        pets_b = Simulator.parse_lineup(lineup_b)
+        key = BattleCache.get_key(pets_a, pets_b, round)
+
+        new_result = SimulationResult()
+        if key in self._results:
+            new_result.merge(self._results[key])
+        new_result.merge(result)
+        self._put(key, new_result)
+
+    # Caches a result that was simulated elsewhere (ex: in a worker process)
+    def put(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', result: 'SimulationResult', round: int = 0):
+        pets_a = Simulator.parse_lineup(lineup_a)
+        pets_b = Simulator.parse_lineup(lineup_b)
+        self._put(BattleCache.get_key(pets_a, pets_b, round), result)
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._results),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0
+        }
+
+    def clear(self):
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key: tuple, num_samples: int) -> Optional['SimulationResult']:
+        result = self._find(key, num_samples)
+        self._count_lookup(result)
+        return result
+
+    # Returns the cached result if it has enough battles, without counting the lookup
+    def _find(self, key: tuple, num_samples: int) -> Optional['SimulationResult']:
+        result = self._results.get(key)
+        if result is not None and result.get_num_battles() >= num_samples:
+            self._results.move_to_end(key)
+            return result
+        return None
+
+    def _count_lookup(self, result: Optional['SimulationResult']):
+        if result is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def _put(self, key: tuple, result: 'SimulationResult'):
+        self._results[key] = result
+        self._results.move_to_end(key)
+
+        while len(self._results) > self.max_size:
+            self._results.popitem(last = False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._results)
@@ -0,0 +1,171 @@
+from collections import defaultdict
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Tuple
+
+from engine.config.gameconfig import MAX_BATTLE_TURNS
+from engine.game.abilitytype import AbilityType
+from engine.game.battle import Battle
+from engine.game.battlepet import HONEY, BattlePet
+from engine.sim.outcomeprobabilities import OutcomeProbabilities
+from engine.sim.scriptedrandom import ScriptedRandom
+from engine.sim.simstate import SimState
+from engine.sim.simulator import LineupDescription, Simulator
+from engine.state.battleplayerstate import BattlePlayerState
+
+WIN = OutcomeProbabilities(win = Fraction(1))
+TIE = OutcomeProbabilities(tie = Fraction(1))
+LOSS = OutcomeProbabilities(loss = Fraction(1))
+
+# Most battle phases one solve runs before giving up, so a solve takes seconds rather than minutes
+MAX_BRANCHES = 100_000
+
+
+# Computes the exact outcome probabilities of a matchup instead of sampling it.
+# Every random draw in a battle (ex: Mosquito, Blowfish, Ant and Spider targets) is a
+# branch point. Each phase of the battle is rerun once per possible sequence of draws,
+# and the resulting battle states are merged with their probabilities. Battles that reach
+# the same state between attack turns share the rest of their outcome. Matchups that
+# need more than max_branches phases to be run (ex: several high level Mosquitoes on
+# both sides) raise a ValueError instead of running for minutes.
+# Like Battle, battles that stall or are still running after max_turns attack turns are ties
+class ExactSolver:
+    def __init__(self):
+        self.max_turns = MAX_BATTLE_TURNS
+        self.max_branches = MAX_BRANCHES
+        self._num_branches = 0
+
+        # The outcome from every solved state, with the most attack turns any branch took from it.
+        # They hold for any turn the state is reached at, as long as those turns still fit in max_turns
+        self._outcomes: Dict[tuple, Tuple['OutcomeProbabilities', int]] = {}
+
+        # Outcomes that have branches cut short by max_turns, so they only hold for the same turn
+        self._limited_outcomes: Dict[Tuple[tuple, int], 'OutcomeProbabilities'] = {}
+
+    def solve(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription') -> 'OutcomeProbabilities':
+        simulator = Simulator(lineup_a, lineup_b)
+        self._num_branches = 0
+
+        def run_start(rng: 'ScriptedRandom') -> 'Battle':
+            simulator.state.rng = rng
+            simulator.battle.start_battle()
+            return simulator.battle
+
+        outcome = OutcomeProbabilities()
+        for state, probability in self._enumerate_phase(run_start).items():
+            outcome.add_scaled(self._solve_state(state, 0)[0], probability)
+        return outcome
+
+    # Forgets the solved battle states
+    def clear(self):
+        self._outcomes.clear()
+        self._limited_outcomes.clear()
+
+    def __len__(self) -> int:
+        return len(self._outcomes) + len(self._limited_outcomes)
+
+    # Returns the outcome probabilities from a battle state before the given attack turn, and
+    # the most attack turns any branch took from it (None if a branch reached max_turns)
+    def _solve_state(self, state: tuple, turn: int) -> Tuple['OutcomeProbabilities', Optional[int]]:
+        pets_a, pets_b = state
+        if len(pets_a) == 0 and len(pets_b) == 0:
+            return TIE, 0
+        elif len(pets_a) == 0:
+            return LOSS, 0
+        elif len(pets_b) == 0:
+            return WIN, 0
+        elif turn == self.max_turns:
+            return TIE, None
+
+        if state in self._outcomes:
+            outcome, num_turns = self._outcomes[state]
+            if turn + num_turns <= self.max_turns:
+                return outcome, num_turns
+        if (state, turn) in self._limited_outcomes:
+            return self._limited_outcomes[(state, turn)], None
+
+        may_stall = self._load_battle(state, ScriptedRandom([])).may_stall()
+
+        def run_attack_turn(rng: 'ScriptedRandom') -> 'Battle':
+            battle = self._load_battle(state, rng)
+            battle.run_attack_turn()
+            return battle
+
+        outcome = OutcomeProbabilities()
+        num_turns: Optional[int] = 1
+        for next_state, probability in self._enumerate_phase(run_attack_turn).items():
+            # A turn that leaves every pet's health and attack as they were would repeat forever
+            if may_stall and self._get_stats(next_state) == self._get_stats(state):
+                outcome.add_scaled(TIE, probability)
+                continue
+
+            next_outcome, next_num_turns = self._solve_state(next_state, turn + 1)
+            outcome.add_scaled(next_outcome, probability)
+            if num_turns is not None:
+                num_turns = max(num_turns, 1 + next_num_turns) if next_num_turns is not None else None
+
+        if num_turns is not None:
+            self._outcomes[state] = (outcome, num_turns)
+        else:
+            self._limited_outcomes[(state, turn)] = outcome
+        return outcome, num_turns
+
+    # Runs a phase of the battle once for every sequence of random draws and
+    # returns the probability of each resulting battle state
+    def _enumerate_phase(self, run_phase: Callable[['ScriptedRandom'], 'Battle']) -> Dict[tuple, Fraction]:
+        states: Dict[tuple, Fraction] = defaultdict(Fraction)
+
+        script: List[int] = []
+        while script is not None:
+            self._num_branches += 1
+            if self._num_branches > self.max_branches:
+                raise ValueError(f"The matchup has more than {self.max_branches} branches, which is too many to solve exactly")
+
+            rng = ScriptedRandom(script, self._is_ordered)
+            battle = run_phase(rng)
+
+            probability = Fraction(1)
+            for num_options in rng.num_options:
+                probability /= num_options
+
+            states[self._get_state(battle)] += probability
+            script = rng.get_next_script()
+
+        return states
+
+    # Damage only queues the abilities of pets that are hurt or faint, so the order
+    # pets are picked in (ex: Mosquito targets) doesn't matter for the other pets
+    @staticmethod
+    def _is_ordered(item) -> bool:
+        if not isinstance(item, BattlePet): return True
+        return item.pet_config.ABILITY_TYPE in (AbilityType.HURT, AbilityType.FAINTED) or item.carried_food is HONEY
+
+    def _get_state(self, battle: 'Battle') -> tuple:
+        return (
+            tuple((pet.pet_config, pet._health, pet._attack, pet.sub_level, pet.carried_food) for pet in battle.player.battle_pets),
+            tuple((pet.pet_config, pet._health, pet._attack, pet.sub_level, pet.carried_food) for pet in battle.challenger.battle_pets)
+        )
+
+    # What Battle compares to find stalled turns
+    def _get_stats(self, state: tuple) -> tuple:
+        return tuple(tuple((pet_config, health, attack) for pet_config, health, attack, _, _ in pets) for pets in state)
+
+    def _load_battle(self, state: tuple, rng: 'ScriptedRandom') -> 'Battle':
+        sim_state = SimState()
+        sim_state.rng = rng
+
+        player = BattlePlayerState(0, sim_state)
+        challenger = BattlePlayerState(1, sim_state)
+        battle = Battle(player, challenger, sim_state, None)
+
+        for side, opponent, pets in ((player, challenger, state[0]), (challenger, player, state[1])):
+            side.opponent = opponent
+            side.battle = battle
+            side.battle_pets = [BattlePet(health, attack, pet_config, side, sub_level, carried_food) for pet_config, health, attack, sub_level, carried_food in pets]
+            side.reset_battle_ability_types()
+
+        return battle
+
+
+# Returns the exact win/tie/loss probabilities of lineup A against lineup B
+def solve(lineup_a: 'LineupDescription', lineup_b: 'LineupDescription') -> 'OutcomeProbabilities':
+    return ExactSolver().solve(lineup_a, lineup_b)
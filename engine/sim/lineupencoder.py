@@ -0,0 +1,71 @@
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+
+from engine.config.foodtype import FoodType
+from engine.config.gameconfig import PET_POSITIONS
+from engine.config.pettype import TIER_PETS
+from engine.sim.simulator import Simulator
+
+if TYPE_CHECKING:
+    from engine.sim.lineuppet import LineupPet
+    from engine.sim.simulator import LineupDescription
+
+# Pets a lineup can start a battle with. Summoned pets are only seen mid battle
+ENCODED_PET_TYPES = [pet_type for tier_pets in TIER_PETS for pet_type in tier_pets]
+
+# Foods a pet can still be carrying when a battle starts
+ENCODED_FOOD_TYPES = [FoodType.HONEY, FoodType.MEAT_BONE, FoodType.GARLIC]
+
+# Stats are divided by this, so most of them end up between 0 and 1
+STAT_SCALE = 50
+
+# Pet one-hot, health, attack, level, food one-hot
+SLOT_SIZE = len(ENCODED_PET_TYPES) + 3 + len(ENCODED_FOOD_TYPES)
+LINEUP_SIZE = PET_POSITIONS * SLOT_SIZE
+
+
+# Turns lineups into fixed-size feature vectors for the battle surrogate. Every slot of
+# a lineup, front pet first, has a one-hot pet type, scaled stats, the level and a one-hot
+# carried food. Empty slots are all zeros. Pets and foods are identified by their enum name
+# (ex: "MEAT_BONE"), which the submission helper's enums share, so the exported model can
+# be used without the engine
+class LineupEncoder:
+    @staticmethod
+    def get_pet_names() -> List[str]:
+        return [pet_type.name for pet_type in ENCODED_PET_TYPES]
+
+    @staticmethod
+    def get_food_names() -> List[str]:
+        return [food_type.name for food_type in ENCODED_FOOD_TYPES]
+
+    @staticmethod
+    def encode_lineup(lineup: 'LineupDescription', out: Optional[np.ndarray] = None) -> np.ndarray:
+        features = out if out is not None else np.zeros(LINEUP_SIZE, dtype = np.float32)
+
+        # Empty slots and dead pets are removed when the battle starts, so the pets are packed to the front
+        pets = [pet for pet in Simulator.parse_lineup(lineup) if pet is not None and pet.health > 0]
+        for slot, pet in enumerate(pets[:PET_POSITIONS]):
+            LineupEncoder._encode_pet(pet, features[slot * SLOT_SIZE:(slot + 1) * SLOT_SIZE])
+        return features
+
+    # Returns one row per matchup, lineup A's features followed by lineup B's
+    @staticmethod
+    def encode_matchups(lineups_a: List['LineupDescription'], lineups_b: List['LineupDescription']) -> np.ndarray:
+        features = np.zeros((len(lineups_a), 2 * LINEUP_SIZE), dtype = np.float32)
+        for row, (lineup_a, lineup_b) in enumerate(zip(lineups_a, lineups_b)):
+            LineupEncoder.encode_lineup(lineup_a, features[row, :LINEUP_SIZE])
+            LineupEncoder.encode_lineup(lineup_b, features[row, LINEUP_SIZE:])
+        return features
+
+    @staticmethod
+    def _encode_pet(pet: 'LineupPet', features: np.ndarray):
+        features[ENCODED_PET_TYPES.index(pet.pet_type)] = 1
+
+        stats = len(ENCODED_PET_TYPES)
+        features[stats] = pet.health / STAT_SCALE
+        features[stats + 1] = pet.attack / STAT_SCALE
+        features[stats + 2] = pet.level / 3
+
+        if pet.carried_food in ENCODED_FOOD_TYPES:
+            features[stats + 3 + ENCODED_FOOD_TYPES.index(pet.carried_food)] = 1
@@ -0,0 +1,111 @@
+from typing import TYPE_CHECKING, Optional, Union
+
+from engine.config.foodconfig import FOOD_CONFIG
+from engine.config.foodtype import FoodType
+from engine.config.gameconfig import LEVEL_2_CUTOFF, LEVEL_3_CUTOFF
+from engine.config.petconfig import PET_CONFIG
+from engine.config.pettype import PetType
+from engine.state.petstate import PetState
+
+PET_TYPES = {pet_config: pet_type for pet_type, pet_config in PET_CONFIG.items()}
+FOOD_TYPES = {food_config: food_type for food_type, food_config in FOOD_CONFIG.items()}
+
+if TYPE_CHECKING:
+    from engine.config.foodconfig import FoodConfig
+    from engine.config.petconfig import PetConfig
+    from engine.state.battleplayerstate import BattlePlayerState
+    from engine.state.gamestate import GameState
+
+
+# A plain description of a pet in a lineup, used to set up battles without a game
+class LineupPet:
+    # Accepts the same dict the engine sends to submissions for other players' pets
+    # (ex: {"type": "Horse", "health": 1, "attack": 2, "level": 1, "carried_food": "Honey"})
+    # Enum names (ex: "MEAT_BONE") are accepted as well. Missing stats default to the base stats
+    @staticmethod
+    def from_dict(dict: dict) -> 'LineupPet':
+        pet_type = LineupPet.get_pet_type(dict["type"])
+        pet_config = PET_CONFIG[pet_type]
+        carried_food = dict.get("carried_food")
+
+        return LineupPet(
+            pet_type,
+            health = int(dict["health"]) if "health" in dict else pet_config.BASE_HEALTH,
+            attack = int(dict["attack"]) if "attack" in dict else pet_config.BASE_ATTACK,
+            level = int(dict.get("level", 1)),
+            carried_food = LineupPet.get_food_type(carried_food) if carried_food is not None else None
+        )
+
+    # Copies a pet from a game, including the progress towards its next level
+    @staticmethod
+    def from_pet_state(pet: 'PetState') -> 'LineupPet':
+        carried_food = FOOD_TYPES[pet.carried_food] if pet.carried_food is not None else None
+        return LineupPet(PET_TYPES[pet.pet_config], pet.get_health(), pet.get_attack(), pet.get_level(), carried_food, pet.sub_level)
+
+    # Accepts a PetType, its name (ex: "Horse") or its enum name
+    @staticmethod
+    def get_pet_type(pet_type: Union[str, 'PetType']) -> 'PetType':
+        if isinstance(pet_type, PetType):
+            return pet_type
+        return PetType[pet_type.upper().replace(" ", "_")]
+
+    # Accepts a FoodType, its name (ex: "Meat Bone") or its enum name
+    @staticmethod
+    def get_food_type(food_type: Union[str, 'FoodType']) -> 'FoodType':
+        if isinstance(food_type, FoodType):
+            return food_type
+        return FoodType[food_type.upper().replace(" ", "_")]
+
+    def __init__(self, pet_type: 'PetType', health: int, attack: int, level: int = 1, carried_food: Optional['FoodType'] = None, sub_level: Optional[int] = None):
+        if level not in (1, 2, 3):
+            raise ValueError(f"Invalid level {level} for {pet_type.name}")
+
+        self.pet_type = pet_type
+        self.pet_config: 'PetConfig' = PET_CONFIG[pet_type]
+        self.health = health
+        self.attack = attack
+        self.level = level
+        self.carried_food = carried_food
+
+        # Higher sub levels go first in ability order. Defaults to the lowest sub level of the level
+        self.sub_level = sub_level
+
+    # The inverse of from_dict
+    def to_dict(self) -> dict:
+        return {
+            "type": self.pet_config.PET_NAME,
+            "health": self.health,
+            "attack": self.attack,
+            "level": self.level,
+            "carried_food": FOOD_CONFIG[self.carried_food].FOOD_NAME if self.carried_food is not None else None
+        }
+
+    # Everything about the pet that can change a battle's outcome
+    def get_key(self) -> tuple:
+        return (self.pet_type.value, self.health, self.attack, self.get_sub_level(), self.carried_food.value if self.carried_food is not None else 0)
+
+    def get_sub_level(self) -> int:
+        if self.sub_level is not None:
+            return self.sub_level
+        elif self.level == 3:
+            return LEVEL_3_CUTOFF
+        elif self.level == 2:
+            return LEVEL_2_CUTOFF
+        else:
+            return 0
+
+    def get_carried_food_config(self) -> Optional['FoodConfig']:
+        return FOOD_CONFIG[self.carried_food] if self.carried_food is not None else None
+
+    def create_pet_state(self, player: 'BattlePlayerState', state: 'GameState') -> 'PetState':
+        pet = PetState(self.health, self.attack, self.pet_config, player, state)
+        pet.sub_level = self.get_sub_level()
+        pet.carried_food = self.get_carried_food_config()
+        return pet
+
+    # Pickled by pet type, so the copy a worker process gets still uses the shared PET_CONFIG entry
+    def __reduce__(self) -> tuple:
+        return (LineupPet, (self.pet_type, self.health, self.attack, self.level, self.carried_food, self.sub_level))
+
+    def __repr__(self) -> str:
+        return f"{self.pet_config.PET_NAME}({self.health}/{self.attack} L{self.level})"
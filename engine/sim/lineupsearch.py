@@ -0,0 +1,227 @@
+from argparse import ArgumentParser
+from concurrent.futures import Executor, ProcessPoolExecutor
+import json
+import os
+from random import Random
+from typing import Dict, List, Optional, Tuple, Union
+
+from engine.config.gameconfig import PET_POSITIONS
+from engine.config.petconfig import PET_CONFIG
+from engine.config.pettype import TIER_PETS, PetType
+from engine.sim.battlecache import BattleCache
+from engine.sim.lineuppet import LineupPet
+from engine.sim.parallelsimulator import CHUNKS_PER_WORKER
+from engine.sim.simulationresult import SimulationResult
+from engine.sim.simulator import LineupDescription, Simulator, simulate
+
+# A candidate lineup, front pet first, as (pet type, health above base, attack above base)
+Candidate = Tuple[Tuple['PetType', int, int], ...]
+
+# A lineup, or an OtherPlayerInfo-style snapshot of a player ({"health": ..., "pets": [...]})
+Opponent = Union['LineupDescription', dict]
+
+
+# Searches for the lineup with the highest win rate against a set of opponents. Candidates
+# are made of pets from the first max_tier shop tiers at the given level, with at most
+# stat_budget health and attack above their base stats in total, and at most PET_POSITIONS
+# pets. Every generation, each lineup in the beam is mutated (swapping pets, replacing a pet,
+# adding or removing a pet, moving stats) and the best beam_width lineups seen so far are kept.
+# A lineup's score is its win rate against every opponent, weighted by how often the opponent
+# was seen. Battles are split across a process pool and cached, so lineups that come up again
+# and opponents that repeat aren't battled twice
+class LineupSearch:
+    # Returns the lineup part of an opponent
+    @staticmethod
+    def get_lineup(opponent: 'Opponent') -> List[Optional['LineupPet']]:
+        if isinstance(opponent, dict):
+            opponent = opponent["pets"]
+        return Simulator.parse_lineup(opponent)
+
+    def __init__(
+        self,
+        opponents: List['Opponent'],
+        weights: Optional[List[float]] = None,
+        max_tier: int = len(TIER_PETS),
+        stat_budget: int = 10,
+        level: int = 1,
+        n: int = 200,
+        seed: Optional[int] = None,
+        num_workers: Optional[int] = None,
+        cache: Optional['BattleCache'] = None,
+        round: int = 0
+    ):
+        if len(opponents) == 0:
+            raise ValueError("At least one opponent is needed")
+
+        weights = weights if weights is not None else [1.0] * len(opponents)
+        if len(weights) != len(opponents):
+            raise ValueError(f"Got {len(weights)} weights for {len(opponents)} opponents")
+
+        # Opponents that were seen more than once are battled once, with their weights added up
+        self.opponents: List[List[Optional['LineupPet']]] = []
+        self.weights: List[float] = []
+        opponent_indexes: Dict[tuple, int] = {}
+        for opponent, weight in zip(opponents, weights):
+            lineup = LineupSearch.get_lineup(opponent)
+            key = BattleCache.get_lineup_key(lineup)
+            if key not in opponent_indexes:
+                opponent_indexes[key] = len(self.opponents)
+                self.opponents.append(lineup)
+                self.weights.append(0.0)
+            self.weights[opponent_indexes[key]] += weight
+
+        total_weight = sum(self.weights)
+        self.weights = [weight / total_weight for weight in self.weights]
+
+        self.pet_types = [pet_type for tier_pets in TIER_PETS[:max_tier] for pet_type in tier_pets]
+        self.stat_budget = stat_budget
+        self.level = level
+        self.n = n
+        self.seed = seed
+        self.rng = Random(seed)
+        self.num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.cache = cache if cache is not None else BattleCache()
+        self.round = round
+
+        self.scores: Dict['Candidate', float] = {}
+
+    # Runs the search and returns the best lineups found, best first, with their win rates.
+    # Stops early once the best score hasn't improved for `patience` generations
+    def run(self, generations: int = 30, beam_width: int = 16, num_children: int = 8, patience: int = 5) -> List[Tuple[List['LineupPet'], float]]:
+        executor = ProcessPoolExecutor(self.num_workers) if self.num_workers > 0 else None
+        try:
+            beam = self._evaluate([self._get_random_candidate() for _ in range(beam_width)], executor)
+            best_score = self.scores[beam[0]]
+            generations_without_improvement = 0
+
+            for _ in range(generations):
+                children = [self._mutate(candidate) for candidate in beam for _ in range(num_children)]
+                beam = self._evaluate(beam + children, executor)[:beam_width]
+
+                if self.scores[beam[0]] > best_score:
+                    best_score = self.scores[beam[0]]
+                    generations_without_improvement = 0
+                else:
+                    generations_without_improvement += 1
+                    if generations_without_improvement >= patience: break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return [(self.get_lineup_pets(candidate), self.scores[candidate]) for candidate in beam]
+
+    def get_lineup_pets(self, candidate: 'Candidate') -> List['LineupPet']:
+        return [
+            LineupPet(pet_type, PET_CONFIG[pet_type].BASE_HEALTH + health, PET_CONFIG[pet_type].BASE_ATTACK + attack, self.level)
+            for pet_type, health, attack in candidate
+        ]
+
+    # Scores the candidates that haven't been scored yet and returns all of them without
+    # duplicates, best first
+    def _evaluate(self, candidates: List['Candidate'], executor: Optional['Executor']) -> List['Candidate']:
+        candidates = list(dict.fromkeys(candidates))
+        new_candidates = [candidate for candidate in candidates if candidate not in self.scores]
+
+        results: Dict[tuple, 'SimulationResult'] = {}
+        jobs: Dict[tuple, tuple] = {}
+        for candidate in new_candidates:
+            pets = self.get_lineup_pets(candidate)
+            for opponent in self.opponents:
+                key = BattleCache.get_key(pets, opponent, self.round)
+                if key in results or key in jobs: continue
+
+                result = self.cache.get(pets, opponent, self.n, self.round)
+                if result is not None:
+                    results[key] = result
+                else:
+                    seed = Random(f"{self.seed}:{key}").getrandbits(64) if self.seed is not None else None
+                    jobs[key] = (pets, opponent, BattleCache.get_num_samples(pets, opponent, self.n), seed)
+
+        for (key, (pets, opponent, _, _)), result in zip(jobs.items(), self._battle(list(jobs.values()), executor)):
+            self.cache.put(pets, opponent, result, self.round)
+            results[key] = result
+
+        for candidate in new_candidates:
+            pets = self.get_lineup_pets(candidate)
+            self.scores[candidate] = sum(
+                weight * results[BattleCache.get_key(pets, opponent, self.round)].get_win_rate()
+                for opponent, weight in zip(self.opponents, self.weights)
+            )
+
+        return sorted(candidates, key = lambda candidate: self.scores[candidate], reverse = True)
+
+    def _battle(self, jobs: List[tuple], executor: Optional['Executor']) -> List['SimulationResult']:
+        if executor is None or len(jobs) <= 1:
+            return [simulate(*job) for job in jobs]
+
+        chunk_size = max(1, len(jobs) // (self.num_workers * CHUNKS_PER_WORKER))
+        return list(executor.map(simulate, *zip(*jobs), chunksize = chunk_size))
+
+    def _get_random_candidate(self) -> 'Candidate':
+        pet_types = [self.rng.choice(self.pet_types) for _ in range(PET_POSITIONS)]
+        stats = [0] * (2 * PET_POSITIONS)
+        for _ in range(self.stat_budget):
+            stats[self.rng.randrange(len(stats))] += 1
+        return tuple((pet_type, stats[2 * i], stats[2 * i + 1]) for i, pet_type in enumerate(pet_types))
+
+    def _mutate(self, candidate: 'Candidate') -> 'Candidate':
+        pets = [list(pet) for pet in candidate]
+        mutation = self.rng.randrange(5)
+
+        if mutation == 0 and len(pets) >= 2:
+            i, j = self.rng.sample(range(len(pets)), 2)
+            pets[i], pets[j] = pets[j], pets[i]
+        elif mutation == 1:
+            self.rng.choice(pets)[0] = self.rng.choice(self.pet_types)
+        elif mutation == 2 and len(pets) < PET_POSITIONS:
+            pets.insert(self.rng.randint(0, len(pets)), [self.rng.choice(self.pet_types), 0, 0])
+        elif mutation == 3 and len(pets) >= 2:
+            # The removed pet's stats go to another pet, so the budget is still used
+            removed = pets.pop(self.rng.randrange(len(pets)))
+            pet = self.rng.choice(pets)
+            pet[1] += removed[1]
+            pet[2] += removed[2]
+        else:
+            self._move_stats(pets)
+
+        # Spends any stats that aren't used yet
+        for _ in range(self.stat_budget - sum(pet[1] + pet[2] for pet in pets)):
+            self.rng.choice(pets)[self.rng.randint(1, 2)] += 1
+
+        return tuple((pet_type, health, attack) for pet_type, health, attack in pets)
+
+    # Moves a few stats from one pet's health or attack to another's
+    def _move_stats(self, pets: List[list]):
+        sources = [(i, stat) for i in range(len(pets)) for stat in (1, 2) if pets[i][stat] > 0]
+        if len(sources) == 0: return
+
+        i, stat = self.rng.choice(sources)
+        amount = self.rng.randint(1, pets[i][stat])
+        pets[i][stat] -= amount
+        self.rng.choice(pets)[self.rng.randint(1, 2)] += amount
+
+
+# Returns the best lineup found against the opponents and its win rate
+def search_lineup(opponents: List['Opponent'], weights: Optional[List[float]] = None, max_tier: int = len(TIER_PETS), stat_budget: int = 10, n: int = 200, seed: Optional[int] = None, num_workers: Optional[int] = None, generations: int = 30) -> Tuple[List['LineupPet'], float]:
+    return LineupSearch(opponents, weights, max_tier, stat_budget, n = n, seed = seed, num_workers = num_workers).run(generations)[0]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog = "engine.sim.lineupsearch")
+    parser.add_argument("opponents", help = "JSON file with a list of opponents, as lineups or OtherPlayerInfo-style snapshots")
+    parser.add_argument("--max-tier", type = int, default = len(TIER_PETS), help = "highest shop tier to use pets from")
+    parser.add_argument("--stat-budget", type = int, default = 10, help = "total health and attack above base stats")
+    parser.add_argument("--level", type = int, default = 1)
+    parser.add_argument("--n", type = int, default = 200, help = "number of battles per matchup")
+    parser.add_argument("--generations", type = int, default = 30)
+    parser.add_argument("--beam-width", type = int, default = 16)
+    parser.add_argument("--workers", type = int, default = None, help = "number of processes to battle in (defaults to the number of CPUs)")
+    parser.add_argument("--seed", type = int, default = None)
+    args = parser.parse_args()
+
+    with open(args.opponents) as file:
+        opponents = json.load(file)
+
+    search = LineupSearch(opponents, None, args.max_tier, args.stat_budget, args.level, args.n, args.seed, args.workers)
+    for lineup, win_rate in search.run(args.generations, args.beam_width):
+        print(json.dumps({"win_rate": win_rate, "lineup": [pet.to_dict() for pet in lineup]}))
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from engine.sim.battlecache import BattleCache
+from engine.sim.lineuppet import LineupPet
+from engine.sim.parallelsimulator import CHUNKS_PER_WORKER
+from engine.sim.simulationresult import SimulationResult
+from engine.sim.simulator import LineupDescription, Simulator, simulate
+
+
+# The win rate of every lineup against every other lineup. win_rates[i, j] is the
+# chance that lineup i beats lineup j, and tie_rates[i, j] the chance that they tie.
+# Only one side of every pair is battled, since lineup j's result against lineup i is
+# the same battles seen from the other side. Pairs found in the cache in either
+# direction aren't battled, and pairs with the same lineups are only battled once
+class MatchupMatrix:
+    def __init__(self, lineups: List['LineupDescription'], cache: Optional['BattleCache'] = None):
+        self.lineups = [Simulator.parse_lineup(lineup) for lineup in lineups]
+        self.cache = cache if cache is not None else BattleCache()
+
+        num_lineups = len(self.lineups)
+        self.win_rates = np.zeros((num_lineups, num_lineups))
+        self.tie_rates = np.zeros((num_lineups, num_lineups))
+
+    # Battles every pair n times (once if neither lineup is random) and returns win_rates.
+    # num_workers defaults to the number of CPUs. With 0 workers, battles run in this process
+    def compute(self, n: int = 1000, seed: Optional[int] = None, num_workers: Optional[int] = None, round: int = 0) -> np.ndarray:
+        if n < 1:
+            raise ValueError(f"Every pair needs at least 1 battle but n was {n}")
+
+        num_lineups = len(self.lineups)
+        pairs = [(i, j) for i in range(num_lineups) for j in range(i, num_lineups)]
+
+        results: Dict[Tuple[int, int], 'SimulationResult'] = {}
+        missing: List[Tuple[int, int]] = []
+        for i, j in pairs:
+            result = self.cache.get_either_side(self.lineups[i], self.lineups[j], n, round)
+            if result is not None:
+                results[(i, j)] = result
+            else:
+                missing.append((i, j))
+
+        # Pairs with the same lineups in either direction share one set of battles
+        to_battle: Dict[tuple, Tuple[int, int]] = {}
+        for i, j in missing:
+            key = BattleCache.get_key(self.lineups[i], self.lineups[j], round)
+            mirrored_key = BattleCache.get_key(self.lineups[j], self.lineups[i], round)
+            if key not in to_battle and mirrored_key not in to_battle:
+                to_battle[key] = (i, j)
+
+        battled = self._battle(list(to_battle.values()), n, seed, num_workers)
+        computed: Dict[tuple, 'SimulationResult'] = {}
+        for (i, j), result in zip(to_battle.values(), battled):
+            self.cache.put(self.lineups[i], self.lineups[j], result, round)
+            computed[BattleCache.get_key(self.lineups[i], self.lineups[j], round)] = result
+
+        for i, j in missing:
+            key = BattleCache.get_key(self.lineups[i], self.lineups[j], round)
+            if key in computed:
+                results[(i, j)] = computed[key]
+            else:
+                results[(i, j)] = computed[BattleCache.get_key(self.lineups[j], self.lineups[i], round)].get_mirrored()
+
+        for (i, j), result in results.items():
+            self._set_rates(i, j, result)
+            if i != j:
+                self._set_rates(j, i, result.get_mirrored())
+
+        return self.win_rates
+
+    # Writes win_rates as a .npy file
+    def save(self, path: str):
+        np.save(path, self.win_rates)
+
+    def _battle(self, pairs: List[Tuple[int, int]], n: int, seed: Optional[int], num_workers: Optional[int]) -> List['SimulationResult']:
+        lineups_a: List[List[Optional['LineupPet']]] = [self.lineups[i] for i, _ in pairs]
+        lineups_b: List[List[Optional['LineupPet']]] = [self.lineups[j] for _, j in pairs]
+        num_samples = [BattleCache.get_num_samples(lineup_a, lineup_b, n) for lineup_a, lineup_b in zip(lineups_a, lineups_b)]
+
+        # Every pair gets its own seed, so the results don't depend on the number of workers
+        seeds = [Random(f"{seed}:{i}:{j}").getrandbits(64) if seed is not None else None for i, j in pairs]
+
+        num_workers = num_workers if num_workers is not None else os.cpu_count()
+        if num_workers == 0 or len(pairs) <= 1:
+            return [simulate(*args) for args in zip(lineups_a, lineups_b, num_samples, seeds)]
+
+        chunk_size = max(1, len(pairs) // (num_workers * CHUNKS_PER_WORKER))
+        with ProcessPoolExecutor(num_workers) as executor:
+            return list(executor.map(simulate, lineups_a, lineups_b, num_samples, seeds, chunksize = chunk_size))
+
+    def _set_rates(self, i: int, j: int, result: 'SimulationResult'):
+        num_battles = result.get_num_battles()
+        self.win_rates[i, j] = result.wins / num_battles
+        self.tie_rates[i, j] = result.ties / num_battles
+
+
+# Returns the win rate of every lineup against every other lineup, and saves it as a .npy file if a path is given
+def compute_matchup_matrix(lineups: List['LineupDescription'], n: int = 1000, seed: Optional[int] = None, num_workers: Optional[int] = None, path: Optional[str] = None) -> np.ndarray:
+    matrix = MatchupMatrix(lineups)
+    win_rates = matrix.compute(n, seed, num_workers)
+    if path is not None:
+        matrix.save(path)
+    return win_rates
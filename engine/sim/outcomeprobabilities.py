@@ -0,0 +1,48 @@
+from fractions import Fraction
+from math import sqrt
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine.sim.simulationresult import SimulationResult
+
+# How many standard deviations simulated counts can be from the expected counts
+DEFAULT_MAX_DEVIATIONS = 4
+
+
+# Exact outcome probabilities of a matchup, from the perspective of lineup A
+class OutcomeProbabilities:
+    def __init__(self, win: Fraction = Fraction(0), tie: Fraction = Fraction(0), loss: Fraction = Fraction(0)):
+        self.win = win
+        self.tie = tie
+        self.loss = loss
+
+    def add_scaled(self, other: 'OutcomeProbabilities', probability: Fraction):
+        self.win += other.win * probability
+        self.tie += other.tie * probability
+        self.loss += other.loss * probability
+
+    def get_win_rate(self) -> float:
+        return float(self.win)
+
+    # Whether simulated battles could have come from these probabilities. Outcomes that
+    # can't happen must never be simulated, and the rest must be within max_deviations
+    # standard deviations of their expected counts
+    def is_consistent_with(self, result: 'SimulationResult', max_deviations: float = DEFAULT_MAX_DEVIATIONS) -> bool:
+        num_battles = result.get_num_battles()
+        for probability, count in ((self.win, result.wins), (self.tie, result.ties), (self.loss, result.losses)):
+            if probability == 0 or probability == 1:
+                if count != probability * num_battles:
+                    return False
+            elif abs(count - probability * num_battles) > max_deviations * sqrt(num_battles * probability * (1 - probability)):
+                return False
+        return True
+
+    def get_view(self) -> dict:
+        return {
+            "win": float(self.win),
+            "tie": float(self.tie),
+            "loss": float(self.loss)
+        }
+
+    def __repr__(self) -> str:
+        return f"win {float(self.win):.4f}, tie {float(self.tie):.4f}, loss {float(self.loss):.4f}"
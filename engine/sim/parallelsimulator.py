@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import List, Optional, Tuple
+
+from engine.game.battlestats import BattleStats
+from engine.sim.simulationresult import SimulationResult
+from engine.sim.simulator import LineupDescription, simulate, simulate_with_stats
+
+# Each worker gets a few chunks so a slow chunk doesn't leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+
+# Splits the battles of a matchup across a process pool. Every chunk of battles
+# is run with its own seed, derived from the given seed, so the merged result
+# doesn't depend on how the chunks were scheduled
+class ParallelSimulator:
+    def __init__(self, num_workers: Optional[int] = None):
+        self.num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.executor = ProcessPoolExecutor(self.num_workers)
+
+    def simulate(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, seed: Optional[int] = None) -> 'SimulationResult':
+        chunk_sizes = self._get_chunk_sizes(n)
+        chunk_seeds = self._get_chunk_seeds(len(chunk_sizes), seed)
+
+        futures = [self.executor.submit(simulate, lineup_a, lineup_b, chunk_size, chunk_seed) for chunk_size, chunk_seed in zip(chunk_sizes, chunk_seeds)]
+
+        result = SimulationResult()
+        for future in futures:
+            result.merge(future.result())
+        return result
+
+    # Like simulate, and also returns the stats of every chunk merged together
+    def simulate_with_stats(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, seed: Optional[int] = None) -> Tuple['SimulationResult', 'BattleStats']:
+        chunk_sizes = self._get_chunk_sizes(n)
+        chunk_seeds = self._get_chunk_seeds(len(chunk_sizes), seed)
+
+        futures = [self.executor.submit(simulate_with_stats, lineup_a, lineup_b, chunk_size, chunk_seed) for chunk_size, chunk_seed in zip(chunk_sizes, chunk_seeds)]
+
+        result = SimulationResult()
+        stats = BattleStats()
+        for future in futures:
+            chunk_result, chunk_stats = future.result()
+            result.merge(chunk_result)
+            stats.merge(chunk_stats)
+        return result, stats
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'ParallelSimulator':
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def _get_chunk_sizes(self, n: int) -> List[int]:
+        num_chunks = max(1, min(n, self.num_workers * CHUNKS_PER_WORKER))
+        chunk_size, remainder = divmod(n, num_chunks)
+        return [chunk_size + 1 if i < remainder else chunk_size for i in range(num_chunks)]
+
+    def _get_chunk_seeds(self, num_chunks: int, seed: Optional[int]) -> List[int]:
+        seed_stream = Random(seed)
+        return [seed_stream.getrandbits(64) for _ in range(num_chunks)]
+
+
+# Battles lineup A against lineup B n times across a process pool and counts the outcomes for lineup A
+def simulate_parallel(lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, seed: Optional[int] = None, num_workers: Optional[int] = None) -> 'SimulationResult':
+    with ParallelSimulator(num_workers) as simulator:
+        return simulator.simulate(lineup_a, lineup_b, n, seed)
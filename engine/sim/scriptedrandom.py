@@ -0,0 +1,48 @@
+from itertools import combinations, permutations
+from typing import Any, Callable, List, Optional, Sequence
+
+
+# Stands in for the game's Random when enumerating every outcome of a battle.
+# Each draw picks the option given by the script, or the first option once the
+# script runs out, and records how many options there were.
+# is_ordered tells whether the order an item is sampled in can change the battle
+class ScriptedRandom:
+    def __init__(self, script: List[int], is_ordered: Callable[[Any], bool] = lambda item: True):
+        self.script = script
+        self.is_ordered = is_ordered
+        self.num_options: List[int] = []
+
+    def choice(self, seq: Sequence):
+        return seq[self._draw(len(seq))]
+
+    # Every set of k items is equally likely, so each is its own option. Only the order of the
+    # items where it matters is branched on after that, and the other items come first
+    def sample(self, population: Sequence, k: int) -> list:
+        selections = list(combinations(range(len(population)), k))
+        selection = [population[i] for i in selections[self._draw(len(selections))]]
+
+        ordered = [item for item in selection if self.is_ordered(item)]
+        if len(ordered) > 1:
+            orders = list(permutations(ordered))
+            ordered = list(orders[self._draw(len(orders))])
+        return [item for item in selection if not self.is_ordered(item)] + ordered
+
+    # Returns the script of the next branch to run, or None once every branch has been run
+    def get_next_script(self) -> Optional[List[int]]:
+        script = self.script[:len(self.num_options)]
+        while len(script) > 0 and script[-1] + 1 >= self.num_options[len(script) - 1]:
+            script.pop()
+
+        if len(script) == 0:
+            return None
+
+        script[-1] += 1
+        return script
+
+    def _draw(self, num_options: int) -> int:
+        position = len(self.num_options)
+        if position == len(self.script):
+            self.script.append(0)
+
+        self.num_options.append(num_options)
+        return self.script[position]
@@ -0,0 +1,16 @@
+from random import Random
+from typing import Optional
+
+
+# Stands in for GameState when battles are simulated outside of a game
+class SimState:
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = Random(seed)
+
+        self.round = 0
+        self._next_id = 0
+
+    def get_id(self) -> int:
+        id = self._next_id
+        self._next_id += 1
+        return id
@@ -0,0 +1,43 @@
+from typing import Optional
+
+
+# Outcome counts of a matchup, from the perspective of lineup A
+class SimulationResult:
+    def __init__(self, wins: int = 0, losses: int = 0, ties: int = 0):
+        self.wins = wins
+        self.losses = losses
+        self.ties = ties
+
+    def add_outcome(self, lost: Optional[bool]):
+        if lost is None:
+            self.ties += 1
+        elif lost:
+            self.losses += 1
+        else:
+            self.wins += 1
+
+    def merge(self, other: 'SimulationResult'):
+        self.wins += other.wins
+        self.losses += other.losses
+        self.ties += other.ties
+
+    # The same battles from lineup B's perspective
+    def get_mirrored(self) -> 'SimulationResult':
+        return SimulationResult(self.losses, self.wins, self.ties)
+
+    def get_num_battles(self) -> int:
+        return self.wins + self.losses + self.ties
+
+    def get_win_rate(self) -> float:
+        num_battles = self.get_num_battles()
+        return self.wins / num_battles if num_battles > 0 else 0.0
+
+    def get_view(self) -> dict:
+        return {
+            "wins": self.wins,
+            "losses": self.losses,
+            "ties": self.ties
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.wins} wins, {self.losses} losses, {self.ties} ties"
@@ -0,0 +1,87 @@
+from typing import List, Optional, Tuple, Union
+
+from engine.config.gameconfig import PET_POSITIONS
+from engine.game.battle import Battle
+from engine.game.battlerecorder import BattleRecorder
+from engine.game.battlestats import BattleStats
+from engine.sim.lineuppet import LineupPet
+from engine.sim.simstate import SimState
+from engine.sim.simulationresult import SimulationResult
+from engine.state.battleplayerstate import BattlePlayerState
+
+# A lineup description is a list of up to PET_POSITIONS slots. Each slot is
+# either None, a LineupPet or a dict accepted by LineupPet.from_dict
+LineupDescription = List[Optional[Union[dict, 'LineupPet']]]
+
+
+# Runs battles between two lineups without a game, game log or pipes
+class Simulator:
+    @staticmethod
+    def parse_lineup(lineup: 'LineupDescription') -> List[Optional['LineupPet']]:
+        if len(lineup) > PET_POSITIONS:
+            raise ValueError(f"A lineup has at most {PET_POSITIONS} pets but {len(lineup)} were given")
+
+        pets = []
+        for pet in lineup:
+            if pet is None or isinstance(pet, LineupPet):
+                pets.append(pet)
+            else:
+                pets.append(LineupPet.from_dict(pet))
+        return pets
+
+    def __init__(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', seed: Optional[int] = None):
+        self.state = SimState(seed)
+        self.player_a = self._create_player(0, Simulator.parse_lineup(lineup_a))
+        self.player_b = self._create_player(1, Simulator.parse_lineup(lineup_b))
+
+        # Each battle starts from a fresh copy of the lineups, so the same battle can be rerun
+        self.battle = Battle(self.player_a, self.player_b, self.state, None)
+        self.player_a.battle = self.battle
+        self.player_b.battle = self.battle
+
+    # Returns whether lineup A lost (None on a tie)
+    def run_battle(self) -> Optional[bool]:
+        return self.battle.fight()
+
+    # Runs one battle with a recorder attached and returns its events
+    def record_battle(self) -> 'BattleRecorder':
+        recorder = BattleRecorder()
+        self.battle.recorder = recorder
+        try:
+            self.battle.fight()
+        finally:
+            self.battle.recorder = None
+        return recorder
+
+    def run(self, n: int) -> 'SimulationResult':
+        result = SimulationResult()
+        for _ in range(n):
+            result.add_outcome(self.run_battle())
+        return result
+
+    # Runs n battles like run and also counts what happens in them. The battles
+    # are the same ones, but slower, since every battle is run turn by turn
+    def run_with_stats(self, n: int) -> Tuple['SimulationResult', 'BattleStats']:
+        stats = BattleStats()
+        self.battle.stats = stats
+        try:
+            result = self.run(n)
+        finally:
+            self.battle.stats = None
+        return result, stats
+
+    def _create_player(self, player_num: int, lineup: List[Optional['LineupPet']]) -> 'BattlePlayerState':
+        player = BattlePlayerState(player_num, self.state)
+        for i, pet in enumerate(lineup):
+            player.pets[i] = pet.create_pet_state(player, self.state) if pet is not None else None
+        return player
+
+
+# Battles lineup A against lineup B n times and counts the outcomes for lineup A
+def simulate(lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, seed: Optional[int] = None) -> 'SimulationResult':
+    return Simulator(lineup_a, lineup_b, seed).run(n)
+
+
+# Like simulate, and also returns the battles' stats
+def simulate_with_stats(lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', n: int = 10_000, seed: Optional[int] = None) -> Tuple['SimulationResult', 'BattleStats']:
+    return Simulator(lineup_a, lineup_b, seed).run_with_stats(n)
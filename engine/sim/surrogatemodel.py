@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from engine.sim.lineupencoder import LINEUP_SIZE, STAT_SCALE, LineupEncoder
+
+DEFAULT_HIDDEN_SIZE = 64
+
+# Adam's defaults
+BETA_1 = 0.9
+BETA_2 = 0.999
+EPSILON = 1e-8
+
+
+# A small neural network that predicts lineup A's win rate from LineupEncoder features,
+# so lineups can be scored without battling them. It has one ReLU hidden layer and a
+# sigmoid output, and is trained with Adam on the cross entropy against simulated win
+# rates. With hidden_size 0 it is a logistic regression.
+# save() writes the weights with the encoding they expect, in the format that the
+# submission helper's BattlePredictor loads
+class SurrogateModel:
+    @staticmethod
+    def load(path: str) -> 'SurrogateModel':
+        with np.load(path) as weights:
+            model = SurrogateModel(weights["w1"].shape[1] if "w1" in weights else 0)
+            for name in model._get_parameters():
+                setattr(model, name, weights[name])
+        return model
+
+    def __init__(self, hidden_size: int = DEFAULT_HIDDEN_SIZE, seed: Optional[int] = None):
+        rng = np.random.default_rng(seed)
+        num_features = 2 * LINEUP_SIZE
+        self.hidden_size = hidden_size
+
+        if hidden_size > 0:
+            self.w1 = (rng.standard_normal((num_features, hidden_size)) * np.sqrt(2 / num_features)).astype(np.float32)
+            self.b1 = np.zeros(hidden_size, dtype = np.float32)
+            self.w2 = (rng.standard_normal(hidden_size) * np.sqrt(1 / hidden_size)).astype(np.float32)
+        else:
+            self.w2 = np.zeros(num_features, dtype = np.float32)
+        self.b2 = np.zeros(1, dtype = np.float32)
+
+    # Returns lineup A's predicted win rate for every row of features
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return _sigmoid(self._get_hidden(features) @ self.w2 + self.b2)
+
+    # Fits the model to win rates (or any targets between 0 and 1) and returns the
+    # mean loss of every epoch
+    def train(self, features: np.ndarray, win_rates: np.ndarray, epochs: int = 50, batch_size: int = 256, learning_rate: float = 1e-3, seed: Optional[int] = None) -> List[float]:
+        rng = np.random.default_rng(seed)
+        names = self._get_parameters()
+        moments = {name: (np.zeros_like(getattr(self, name)), np.zeros_like(getattr(self, name))) for name in names}
+        step = 0
+        losses = []
+
+        for _ in range(epochs):
+            order = rng.permutation(len(features))
+            total_loss = 0.0
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                loss, gradients = self._get_gradients(features[batch], win_rates[batch])
+                total_loss += loss * len(batch)
+
+                step += 1
+                for name in names:
+                    first, second = moments[name]
+                    first *= BETA_1
+                    first += (1 - BETA_1) * gradients[name]
+                    second *= BETA_2
+                    second += (1 - BETA_2) * gradients[name] ** 2
+
+                    corrected_first = first / (1 - BETA_1 ** step)
+                    corrected_second = second / (1 - BETA_2 ** step)
+                    setattr(self, name, getattr(self, name) - learning_rate * corrected_first / (np.sqrt(corrected_second) + EPSILON))
+            losses.append(total_loss / len(order))
+
+        return losses
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            pet_names = np.array(LineupEncoder.get_pet_names()),
+            food_names = np.array(LineupEncoder.get_food_names()),
+            stat_scale = np.array(STAT_SCALE),
+            **{name: getattr(self, name) for name in self._get_parameters()}
+        )
+
+    def _get_parameters(self) -> List[str]:
+        return ["w1", "b1", "w2", "b2"] if self.hidden_size > 0 else ["w2", "b2"]
+
+    def _get_hidden(self, features: np.ndarray) -> np.ndarray:
+        if self.hidden_size == 0:
+            return features
+        return np.maximum(features @ self.w1 + self.b1, 0)
+
+    # Returns the mean cross entropy of a batch and its gradient for every parameter
+    def _get_gradients(self, features: np.ndarray, win_rates: np.ndarray) -> Tuple[float, Dict[str, np.ndarray]]:
+        hidden = self._get_hidden(features)
+        predictions = _sigmoid(hidden @ self.w2 + self.b2)
+
+        clipped = np.clip(predictions, EPSILON, 1 - EPSILON)
+        loss = -np.mean(win_rates * np.log(clipped) + (1 - win_rates) * np.log(1 - clipped))
+
+        output_gradient = (predictions - win_rates) / len(features)
+        gradients = {
+            "w2": hidden.T @ output_gradient,
+            "b2": np.array([output_gradient.sum()], dtype = np.float32)
+        }
+        if self.hidden_size > 0:
+            hidden_gradient = np.outer(output_gradient, self.w2) * (hidden > 0)
+            gradients["w1"] = features.T @ hidden_gradient
+            gradients["b1"] = hidden_gradient.sum(axis = 0)
+
+        return float(loss), gradients
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(x, -30, 30)))
@@ -0,0 +1,141 @@
+from argparse import ArgumentParser
+import json
+from random import Random
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from engine.config.foodtype import TIER_FOOD
+from engine.config.gameconfig import PET_POSITIONS
+from engine.config.petconfig import PET_CONFIG
+from engine.config.pettype import TIER_PETS
+from engine.sim.battlecache import BattleCache
+from engine.sim.exactsolver import ExactSolver
+from engine.sim.lineupencoder import ENCODED_FOOD_TYPES, LineupEncoder
+from engine.sim.lineuppet import LineupPet
+from engine.sim.surrogatemodel import DEFAULT_HIDDEN_SIZE, SurrogateModel
+
+NUM_CALIBRATION_BINS = 10
+
+# Most branches the exact solver takes on a calibration matchup before it's simulated instead
+MAX_EXACT_BRANCHES = 5_000
+
+
+# Trains a SurrogateModel on random lineups battled by the simulator. Lineups use the
+# pets and foods of the first max_tier shop tiers, with random levels and buffs. Every
+# matchup is also added from B's side, so the model sees both directions of a pair.
+# Calibration uses exact win rates for the matchups the exact solver can settle quickly
+class SurrogateTrainer:
+    def __init__(self, max_tier: int = len(TIER_PETS), seed: Optional[int] = None, cache: Optional['BattleCache'] = None):
+        self.max_tier = max_tier
+        self.rng = Random(seed)
+        self.cache = cache if cache is not None else BattleCache()
+        self.solver = ExactSolver()
+        self.solver.max_branches = MAX_EXACT_BRANCHES
+
+        self.pet_types = [pet_type for tier_pets in TIER_PETS[:max_tier] for pet_type in tier_pets]
+        self.food_types = [food_type for tier_food in TIER_FOOD[:max_tier] for food_type in tier_food if food_type in ENCODED_FOOD_TYPES]
+
+    def get_random_lineup(self) -> List[Optional['LineupPet']]:
+        lineup = []
+        for _ in range(self.rng.randint(1, PET_POSITIONS)):
+            pet_type = self.rng.choice(self.pet_types)
+            pet_config = PET_CONFIG[pet_type]
+            level = self.rng.choices((1, 2, 3), (6, 3, 1))[0]
+
+            # Merging gives +1/+1 per pet, and the rest comes from food and abilities
+            buff = 3 * (level - 1) + self.rng.randint(0, 3 * self.max_tier)
+            health_buff = self.rng.randint(0, buff)
+            carried_food = self.rng.choice(self.food_types) if len(self.food_types) > 0 and self.rng.random() < 0.5 else None
+
+            lineup.append(LineupPet(pet_type, pet_config.BASE_HEALTH + health_buff, pet_config.BASE_ATTACK + buff - health_buff, level, carried_food))
+        return lineup
+
+    # Battles num_matchups random matchups n times each and returns their features and
+    # lineup A's win rates, with every matchup followed by its mirror. With exact, the
+    # matchups the exact solver can settle get their exact win rates instead
+    def generate(self, num_matchups: int, n: int = 32, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        lineups_a = []
+        lineups_b = []
+        win_rates = []
+        for _ in range(num_matchups):
+            lineup_a = self.get_random_lineup()
+            lineup_b = self.get_random_lineup()
+            seed = self.rng.getrandbits(64)
+
+            rates = self._solve(lineup_a, lineup_b) if exact else None
+            if rates is None:
+                result = self.cache.simulate(lineup_a, lineup_b, n, seed)
+                rates = (result.wins / result.get_num_battles(), result.losses / result.get_num_battles())
+
+            lineups_a += [lineup_a, lineup_b]
+            lineups_b += [lineup_b, lineup_a]
+            win_rates += rates
+
+        return LineupEncoder.encode_matchups(lineups_a, lineups_b), np.array(win_rates, dtype = np.float32)
+
+    def train(self, num_matchups: int = 20_000, n: int = 32, hidden_size: int = DEFAULT_HIDDEN_SIZE, epochs: int = 50) -> 'SurrogateModel':
+        features, win_rates = self.generate(num_matchups, n)
+        model = SurrogateModel(hidden_size, self.rng.getrandbits(32))
+        model.train(features, win_rates, epochs, seed = self.rng.getrandbits(32))
+        return model
+
+    # Compares the model's predictions with the win rates of new random matchups. They are
+    # exact where the solver can settle the matchup, and simulated n times otherwise
+    def get_calibration_report(self, model: 'SurrogateModel', num_matchups: int = 1000, n: int = 200) -> dict:
+        features, win_rates = self.generate(num_matchups, n, exact = True)
+        return get_calibration_report(model.predict(features), win_rates)
+
+    # Returns lineup A's exact win and loss rates, or None if the matchup has too many branches
+    def _solve(self, lineup_a: List[Optional['LineupPet']], lineup_b: List[Optional['LineupPet']]) -> Optional[Tuple[float, float]]:
+        try:
+            outcome = self.solver.solve(lineup_a, lineup_b)
+        except ValueError:
+            return None
+        return float(outcome.win), float(outcome.loss)
+
+
+# Scores predicted win rates against simulated or exact ones. Predictions are grouped into equal
+# width bins, and every bin has its mean prediction next to its mean simulated win rate.
+# The expected calibration error is the mean gap between the two, weighted by bin size.
+# Accuracy is how often the predicted favourite won more often, ignoring even matchups
+def get_calibration_report(predictions: np.ndarray, win_rates: np.ndarray, num_bins: int = NUM_CALIBRATION_BINS) -> dict:
+    bins = np.minimum((predictions * num_bins).astype(int), num_bins - 1)
+    report_bins = []
+    calibration_error = 0.0
+    for index in range(num_bins):
+        in_bin = bins == index
+        count = int(in_bin.sum())
+        if count == 0: continue
+
+        predicted = float(predictions[in_bin].mean())
+        simulated = float(win_rates[in_bin].mean())
+        calibration_error += count * abs(predicted - simulated)
+        report_bins.append({"low": index / num_bins, "high": (index + 1) / num_bins, "count": count, "predicted": predicted, "simulated": simulated})
+
+    uneven = win_rates != 0.5
+    return {
+        "num_matchups": len(predictions),
+        "brier_score": float(np.mean((predictions - win_rates) ** 2)),
+        "mean_absolute_error": float(np.mean(np.abs(predictions - win_rates))),
+        "accuracy": float(np.mean((predictions[uneven] > 0.5) == (win_rates[uneven] > 0.5))),
+        "expected_calibration_error": calibration_error / len(predictions),
+        "bins": report_bins
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog = "engine.sim.surrogatetrainer")
+    parser.add_argument("path", help = "where to save the model's weights (.npz)")
+    parser.add_argument("--matchups", type = int, default = 20_000, help = "number of random matchups to train on")
+    parser.add_argument("--n", type = int, default = 32, help = "number of battles per training matchup")
+    parser.add_argument("--hidden-size", type = int, default = DEFAULT_HIDDEN_SIZE, help = "size of the hidden layer (0 trains a logistic regression)")
+    parser.add_argument("--epochs", type = int, default = 50)
+    parser.add_argument("--max-tier", type = int, default = len(TIER_PETS), help = "highest shop tier to draw pets and foods from")
+    parser.add_argument("--seed", type = int, default = None)
+    args = parser.parse_args()
+
+    trainer = SurrogateTrainer(args.max_tier, args.seed)
+    model = trainer.train(args.matchups, args.n, args.hidden_size, args.epochs)
+    model.save(args.path)
+    print(json.dumps(trainer.get_calibration_report(model), indent = 4))
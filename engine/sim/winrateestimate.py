@@ -0,0 +1,35 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine.sim.simulationresult import SimulationResult
+
+
+# A win rate for lineup A with a confidence interval. Exact estimates come from
+# matchups without randomness, which only need one battle
+class WinRateEstimate:
+    def __init__(self, result: 'SimulationResult', low: float, high: float, is_exact: bool = False):
+        self.result = result
+        self.low = low
+        self.high = high
+        self.is_exact = is_exact
+
+    def get_win_rate(self) -> float:
+        return self.result.get_win_rate()
+
+    def get_num_battles(self) -> int:
+        return self.result.get_num_battles()
+
+    def get_width(self) -> float:
+        return self.high - self.low
+
+    def get_view(self) -> dict:
+        return {
+            "win_rate": self.get_win_rate(),
+            "low": self.low,
+            "high": self.high,
+            "num_battles": self.get_num_battles(),
+            "is_exact": self.is_exact
+        }
+
+    def __repr__(self) -> str:
+        return f"win rate {self.get_win_rate():.4f} [{self.low:.4f}, {self.high:.4f}] from {self.get_num_battles()} battles"
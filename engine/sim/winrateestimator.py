@@ -0,0 +1,67 @@
+from math import sqrt
+from statistics import NormalDist
+from typing import Optional, Tuple
+
+from engine.sim.battlecache import BattleCache
+from engine.sim.simulationresult import SimulationResult
+from engine.sim.simulator import LineupDescription, Simulator
+from engine.sim.winrateestimate import WinRateEstimate
+
+DEFAULT_MAX_WIDTH = 0.02
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MAX_BATTLES = 100_000
+
+# How many battles are run between interval checks
+BATCH_SIZE = 50
+
+
+# Estimates lineup A's win rate by battling until the Wilson score interval of the
+# win rate is narrower than max_width, or max_battles have been run. Lopsided matchups
+# stop after a few batches, and matchups without random abilities stop after one battle.
+# Ties count as not winning, like SimulationResult.get_win_rate
+class WinRateEstimator:
+    @staticmethod
+    def get_wilson_interval(result: 'SimulationResult', z: float) -> Tuple[float, float]:
+        n = result.get_num_battles()
+        if n == 0:
+            return 0.0, 1.0
+
+        p = result.get_win_rate()
+        denominator = 1 + z * z / n
+        center = (p + z * z / (2 * n)) / denominator
+        half_width = z * sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+        return max(0.0, center - half_width), min(1.0, center + half_width)
+
+    def __init__(self, max_width: float = DEFAULT_MAX_WIDTH, confidence: float = DEFAULT_CONFIDENCE, max_battles: int = DEFAULT_MAX_BATTLES):
+        if not 0 < confidence < 1:
+            raise ValueError(f"Confidence must be between 0 and 1 but was {confidence}")
+        if not 0 < max_width < 1:
+            raise ValueError(f"Max width must be between 0 and 1 but was {max_width}")
+
+        self.max_width = max_width
+        self.confidence = confidence
+        self.max_battles = max_battles
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def estimate(self, lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', seed: Optional[int] = None) -> 'WinRateEstimate':
+        pets_a = Simulator.parse_lineup(lineup_a)
+        pets_b = Simulator.parse_lineup(lineup_b)
+        simulator = Simulator(pets_a, pets_b, seed)
+
+        if BattleCache.is_deterministic(pets_a) and BattleCache.is_deterministic(pets_b):
+            result = simulator.run(1)
+            win_rate = result.get_win_rate()
+            return WinRateEstimate(result, win_rate, win_rate, is_exact = True)
+
+        result = SimulationResult()
+        low, high = 0.0, 1.0
+        while result.get_num_battles() < self.max_battles and high - low > self.max_width:
+            result.merge(simulator.run(min(BATCH_SIZE, self.max_battles - result.get_num_battles())))
+            low, high = WinRateEstimator.get_wilson_interval(result, self.z)
+
+        return WinRateEstimate(result, low, high)
+
+
+# Battles lineup A against lineup B until its win rate is known to within max_width
+def estimate_win_rate(lineup_a: 'LineupDescription', lineup_b: 'LineupDescription', max_width: float = DEFAULT_MAX_WIDTH, confidence: float = DEFAULT_CONFIDENCE, max_battles: int = DEFAULT_MAX_BATTLES, seed: Optional[int] = None) -> 'WinRateEstimate':
+    return WinRateEstimator(max_width, confidence, max_battles).estimate(lineup_a, lineup_b, seed)
@@ -0,0 +1,96 @@
+from random import Random
+from typing import TYPE_CHECKING, List, Optional, Set, Union
+
+from engine.config.gameconfig import PET_POSITIONS
+from engine.config.petconfig import PET_CONFIG
+from engine.config.pettype import PetType
+from engine.game.abilitytype import AbilityType
+from engine.game.battlepet import BattlePet
+
+if TYPE_CHECKING:
+    from engine.game.battle import Battle
+    from engine.state.gamestate import GameState
+    from engine.state.petstate import PetState
+
+
+# The part of a player that a battle needs. It is kept separate from PlayerState
+# so battles can be run without any of the shop, coins or health bookkeeping
+class BattlePlayerState:
+    def __init__(self, player_num: int, state: 'GameState'):
+        self.player_num = player_num
+        self.state = state
+
+        self.pets: List[Optional['PetState']] = [None] * PET_POSITIONS
+
+        # Represents who you are currently battling. This can change to multiple different
+        # players during a single battle stage
+        self.opponent: Optional['BattlePlayerState'] = None
+
+        # Represents a copy of your pets for the purpose of running a battle
+        self.battle_pets: List['BattlePet'] = []
+
+        # The ability types of every pet that has been in battle_pets during the battle
+        # Lets the battle skip phases that no pet can trigger
+        self.battle_ability_types: Set[AbilityType] = set()
+
+        # Represents the current battle the player is in
+        self.battle: Optional['Battle'] = None
+
+        # Contains a reference to the newest summoned pet for use in
+        # FRIEND_SUMMON abilities
+        self.new_summoned_pet: Optional[Union['PetState', 'BattlePet']] = None
+
+    # Where the player's pets and shop draw their random choices from
+    @property
+    def rng(self) -> 'Random':
+        return self.state.rng
+
+    # We copy the pets into battle pets so we can make irreversible changes
+    # during a battle
+    def start_battle(self, opponent: 'BattlePlayerState'):
+        self.opponent = opponent
+        self.battle_pets = [BattlePet.from_pet_state(pet, self) for pet in self.pets if pet is not None]
+        self.reset_battle_ability_types()
+
+    # Has to be called whenever battle_pets is set directly
+    def reset_battle_ability_types(self):
+        self.battle_ability_types = {pet.pet_config.ABILITY_TYPE for pet in self.battle_pets}
+
+    def summon_bee(self, original_pet: 'BattlePet'):
+        bee_config = PET_CONFIG[PetType.BEE]
+        bee = BattlePet(bee_config.BASE_HEALTH, bee_config.BASE_ATTACK, bee_config, self)
+        self.summon_pets(original_pet, [bee])
+
+    def create_pet_to_summon(self, pet_type: 'PetType', health: int, attack: int) -> 'BattlePet':
+        pet_config = PET_CONFIG[pet_type]
+        pet = BattlePet(health, attack, pet_config, self)
+        return pet
+
+    def summon_pets(self, original_pet: 'BattlePet', pets_to_summon: List['BattlePet']):
+        # We insert the pets at where the dying pet is
+        insert_at_index = self.battle_pets.index(original_pet)
+
+        # How many pets are we accepting
+        num_alive = len([pet for pet in self.battle_pets if pet.is_alive()])
+        num_summons = min(PET_POSITIONS - num_alive, len(pets_to_summon))
+
+        # List of pets we are summoning
+        pets_to_summon = pets_to_summon[:num_summons]
+        for pet in pets_to_summon:
+            self.battle_pets.insert(insert_at_index, pet)
+            self.battle_ability_types.add(pet.pet_config.ABILITY_TYPE)
+            if self.battle.recorder is not None:
+                self.battle.recorder.record_summon(pet, self.battle_pets[insert_at_index + 1])
+            if self.battle.stats is not None:
+                self.battle.stats.record_summon(pet)
+            self.friend_summoned(pet)
+
+    def friend_summoned(self, new_pet: Union['PetState', 'BattlePet']):
+        self.new_summoned_pet = new_pet
+
+        for pet in self.battle_pets:
+            if pet != new_pet and pet.is_alive():
+                pet.proc_on_demand_ability(AbilityType.FRIEND_SUMMONED)
+
+        # Clear the reference now its not needed
+        self.new_summoned_pet = None
@@ -1,11 +1,15 @@
-from typing import List
+from random import Random
+from typing import List, Optional
 
 from engine.config.gameconfig import NUM_PLAYERS
 from engine.state.playerstate import PlayerState
 
 
 class GameState:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        # All randomness in a game is drawn from here so a seed reproduces the whole game
+        self.rng = Random(seed)
+
         self.round = -1
         self.players = [PlayerState(i, self) for i in range(NUM_PLAYERS)]
         self.dead_players: List['PlayerState'] = []
@@ -16,10 +20,6 @@ class GameState:
         for player in self.players:
             player.start_new_round()
 
-    def start_battle_stage(self):
-        for player in self.get_alive_players():
-            player.start_battle_stage()
-
     def end_round(self):
         for player in self.players:
             if not player.is_alive() and player not in self.dead_players:
@@ -1,63 +1,56 @@
 from copy import copy
-from random import choice, randint, shuffle
+from random import Random
 from typing import TYPE_CHECKING, List, Optional
 
 from engine.config.foodconfig import FOOD_CONFIG
 from engine.config.foodtype import TIER_FOOD, FoodType
-from engine.config.gameconfig import MAX_SHOP_TIER, NUM_PLAYERS, PET_POSITIONS, STARTING_COINS, STARTING_HEALTH
+from engine.config.gameconfig import MAX_SHOP_TIER, NUM_PLAYERS, STARTING_COINS, STARTING_HEALTH
 from engine.config.petconfig import PET_CONFIG
 from engine.config.pettype import TIER_PETS, PetType
 from engine.config.roundconfig import RoundConfig
 from engine.game.abilitytype import AbilityType
+from engine.state.battleplayerstate import BattlePlayerState
 from engine.state.foodstate import FoodState
 from engine.state.petstate import PetState
 
 if TYPE_CHECKING:
-    from engine.game.battle import Battle
     from engine.state.gamestate import GameState
 
 
-class PlayerState:
+class PlayerState(BattlePlayerState):
     def __init__(self, player_num: int, state: 'GameState'):
-        self.player_num = player_num
-        self.state = state
+        super().__init__(player_num, state)
 
         self.cumulative_time: float = 0
 
         self.health = STARTING_HEALTH
-        self.pets: List[Optional['PetState']] = [None] * PET_POSITIONS
 
         self.shop_pets: List['PetState'] = []
         self.shop_foods: List['FoodState'] = []
         self.shop_perm_health_bonus = 0
         self.shop_perm_attack_bonus = 0
 
-        # Represents who you are currently battling. This can change to multiple different
-        # players during a single battle stage
-        self.opponent: Optional['PlayerState'] = None
-
-        # Represents a copy of your pets for the purpose of running a battle
-        self.battle_pets: List['PetState'] = []
-
         # Represents who will be challenging you during the battle stage
         # Will only be a single player for an entire battle stage
         self.challenger: Optional['PlayerState'] = None
         self.battle_order = [i for i in range(NUM_PLAYERS) if i != player_num]
-        shuffle(self.battle_order)
+        self.state.rng.shuffle(self.battle_order)
         self.next_battle_index = 0
 
-        # Represents the current battle the player is in
-        self.battle: Optional['Battle'] = None
-
-        # Contains a reference to the newest summoned pet for use in
-        # FRIEND_SUMMON abilities
-        self.new_summoned_pet: Optional['PetState'] = None
+        # Reseeded from the game's RNG every round, so buy stages that run at the
+        # same time draw the same numbers whatever order their moves arrive in
+        self._rng: 'Random' = self.state.rng
 
         # Contains a reference to the pet that just ate food
         # for use in FRIEND_ATE_FOOD abilities
         self.pet_that_ate_food: Optional['PetState'] = None
 
+    @property
+    def rng(self) -> 'Random':
+        return self._rng
+
     def start_new_round(self):
+        self._rng = Random(self.state.rng.getrandbits(64))
         self.prev_health = self.health
         self.prev_pets = self._get_pets_copy()
 
@@ -73,12 +66,6 @@ class PlayerState:
             if pet is not None:
                 pet.proc_on_demand_ability(AbilityType.BUY_ROUND_END)
 
-    # We copy the battle pets so we can make irreversible changes
-    # during a battle
-    def start_battle(self, opponent: 'PlayerState'):
-        self.opponent = opponent
-        self.battle_pets = self._get_pets_copy()
-
     def reset_shop_options(self):
         round_config = RoundConfig.get_round_config(self.state.round)
 
@@ -97,44 +84,10 @@ class PlayerState:
     def add_level_up_shop_pet(self):
         round_config = RoundConfig.get_round_config(self.state.round)
         tier = min(round_config.MAX_SHOP_TIER + 1, MAX_SHOP_TIER)
-        pet_type = choice(TIER_PETS[tier - 1])
+        pet_type = self.rng.choice(TIER_PETS[tier - 1])
         shop_pet = self._create_shop_pet(pet_type)
         self.shop_pets.append(shop_pet)
 
-    def summon_bee(self, original_pet: 'PetState'):
-        bee_config = PET_CONFIG[PetType.BEE]
-        bee = PetState(bee_config.BASE_HEALTH, bee_config.BASE_ATTACK, bee_config, self, self.state)
-        self.summon_pets(original_pet, [bee])
-
-    def create_pet_to_summon(self, pet_type: 'PetType', health: int, attack: int):
-        pet_config = PET_CONFIG[pet_type]
-        pet = PetState(health, attack, pet_config, self, self.state)
-        return pet
-
-    def summon_pets(self, original_pet: 'PetState', pets_to_summon: List['PetState']):
-        # We insert the pets at where the dying pet is
-        insert_at_index = self.battle_pets.index(original_pet)
-
-        # How many pets are we accepting
-        num_alive = len([pet for pet in self.battle_pets if pet.is_alive()])
-        num_summons = min(PET_POSITIONS - num_alive, len(pets_to_summon))
-
-        # List of pets we are summoning
-        pets_to_summon = pets_to_summon[:num_summons]
-        for pet in pets_to_summon:
-            self.battle_pets.insert(insert_at_index, pet)
-            self.friend_summoned(pet)
-
-    def friend_summoned(self, new_pet: 'PetState'):
-        self.new_summoned_pet = new_pet
-
-        for pet in self.battle_pets:
-            if pet != new_pet and pet.is_alive():
-                pet.proc_on_demand_ability(AbilityType.FRIEND_SUMMONED)
-
-        # Clear the reference now its not needed
-        self.new_summoned_pet = None
-
     def friend_ate_food(self, fat_pet: 'PetState'):
         self.pet_that_ate_food = fat_pet
         for pet in self.pets:
@@ -192,7 +145,7 @@ class PlayerState:
         for tier in range(max_shop_tier):
             total_num += len(config_tiers[tier])
 
-        global_index = randint(0, total_num - 1)
+        global_index = self.rng.randint(0, total_num - 1)
         for tier in range(max_shop_tier):
             if global_index < len(config_tiers[tier]):
                 return config_tiers[tier][global_index]
@@ -0,0 +1,72 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+from submissionhelper.info.otherplayerpetinfo import OtherPlayerPetInfo
+from submissionhelper.info.playerpetinfo import PlayerPetInfo
+
+PET_POSITIONS = 5
+
+Lineup = List[Optional[Union['PlayerPetInfo', 'OtherPlayerPetInfo']]]
+
+
+class BattlePredictor:
+    # Loads a model trained with the game engine's surrogate trainer
+    # (python -m engine.sim.surrogatetrainer model.npz)
+    # Predictions are only estimates, so check important decisions
+    # against the simulator if you can
+    def __init__(self, path: str):
+        with np.load(path) as weights:
+            self.pet_names: List[str] = [str(name) for name in weights["pet_names"]]
+            self.food_names: List[str] = [str(name) for name in weights["food_names"]]
+            self.stat_scale = float(weights["stat_scale"])
+
+            self.w1: Optional[np.ndarray] = weights["w1"] if "w1" in weights else None
+            self.b1: Optional[np.ndarray] = weights["b1"] if "b1" in weights else None
+            self.w2: np.ndarray = weights["w2"]
+            self.b2: np.ndarray = weights["b2"]
+
+        self.slot_size = len(self.pet_names) + 3 + len(self.food_names)
+        self.lineup_size = PET_POSITIONS * self.slot_size
+
+    # Turns a lineup (ex: player_info.pets or other_player_info.pets)
+    # into the features the model expects
+    def encode(self, pets: 'Lineup') -> np.ndarray:
+        features = np.zeros(self.lineup_size, dtype = np.float32)
+
+        # Empty slots are skipped, so the pets are packed to the front
+        pets = [pet for pet in pets if pet is not None and pet.health > 0]
+        for slot, pet in enumerate(pets[:PET_POSITIONS]):
+            start = slot * self.slot_size
+            if pet.type.name in self.pet_names:
+                features[start + self.pet_names.index(pet.type.name)] = 1
+
+            stats = start + len(self.pet_names)
+            features[stats] = pet.health / self.stat_scale
+            features[stats + 1] = pet.attack / self.stat_scale
+            features[stats + 2] = pet.level / 3
+
+            if pet.carried_food is not None and pet.carried_food.name in self.food_names:
+                features[stats + 3 + self.food_names.index(pet.carried_food.name)] = 1
+
+        return features
+
+    # Returns the chance that each of your lineups beats the opponent's
+    # lineup at the same index. Both are arrays of encoded lineups
+    # (one row per lineup), or a single encoded lineup to use against
+    # every row of the other. Encode lineups once and reuse them, since
+    # this is much faster than encoding
+    def predict_encoded(self, encoded_lineups: np.ndarray, encoded_opponents: np.ndarray) -> np.ndarray:
+        w = self.w1 if self.w1 is not None else self.w2
+
+        # Each side only goes through its half of the first layer, so a single
+        # opponent is only multiplied once
+        output = encoded_lineups @ w[:self.lineup_size] + encoded_opponents @ w[self.lineup_size:]
+        if self.w1 is not None:
+            output = np.maximum(output + self.b1, 0) @ self.w2
+
+        return np.atleast_1d(1 / (1 + np.exp(-np.clip(output + self.b2, -30, 30))))
+
+    # Returns the chance that your lineup beats the opponent's lineup
+    def predict_win_rate(self, pets: 'Lineup', opponent_pets: 'Lineup') -> float:
+        return float(self.predict_encoded(self.encode(pets), self.encode(opponent_pets))[0])
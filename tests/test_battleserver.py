@@ -0,0 +1,50 @@
+import io
+import json
+import os
+
+import pytest
+
+from engine.battleserver import BattleServer
+
+MOSQUITOES = [{"type": "Mosquito", "health": 2, "attack": 2}, {"type": "Mosquito", "health": 3, "attack": 1}]
+ANTS = [{"type": "Fish", "health": 3, "attack": 2}, {"type": "Ant", "health": 1, "attack": 1}]
+
+
+def get_responses(lines, num_workers: int):
+    server = BattleServer(io.StringIO(), io.StringIO(), num_workers)
+    try:
+        return server.handle_batch(lines[:3]) + server.handle_batch(lines[3:])
+    finally:
+        server.shutdown()
+
+
+# Batches top up the same matchup more than once, both in and across batches, and from both sides
+def test_workers_match_inline():
+    requests = [
+        {"id": 0, "lineup_a": MOSQUITOES, "lineup_b": ANTS, "n": 100, "seed": 1},
+        {"id": 1, "lineup_a": MOSQUITOES, "lineup_b": ANTS, "n": 300, "seed": 2},
+        {"id": 2, "lineup_a": ANTS, "lineup_b": MOSQUITOES, "n": 200, "seed": 3},
+        {"id": 3, "lineup_a": MOSQUITOES, "lineup_b": ANTS, "n": 200, "seed": 4},
+        {"id": 4, "lineup_a": MOSQUITOES, "lineup_b": ANTS, "n": 500, "seed": 5},
+        {"id": 5, "lineup_a": MOSQUITOES, "lineup_b": [{"type": "Nope"}], "n": 100, "seed": 6}
+    ]
+    lines = [json.dumps(request) for request in requests]
+
+    inline = get_responses(lines, 0)
+    assert "error" in inline[5]
+    assert [sum(response[outcome] for outcome in ("wins", "losses", "ties")) for response in inline[:5]] == [100, 300, 200, 300, 500]
+    assert get_responses(lines, 2) == inline
+
+
+def test_invalid_utf8_only_fails_its_line():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b'{"id": 0, "lineup_a": [\xff], "lineup_b": []}\n' + json.dumps({"id": 1, "lineup_a": ANTS, "lineup_b": MOSQUITOES, "n": 10}).encode() + b"\n")
+    os.close(write_fd)
+
+    output = io.StringIO()
+    with os.fdopen(read_fd) as input:
+        BattleServer(input, output).run()
+
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [response["id"] for response in responses] == [None, 1]
+    assert "error" in responses[0] and "error" not in responses[1]
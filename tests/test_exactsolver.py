@@ -0,0 +1,60 @@
+from collections import defaultdict
+from fractions import Fraction
+from time import monotonic
+
+import pytest
+
+from engine.sim.exactsolver import ExactSolver
+from engine.sim.scriptedrandom import ScriptedRandom
+from engine.sim.simulator import simulate
+
+
+def mosquito(level: int) -> dict:
+    return {"type": "Mosquito", "health": 3, "attack": 2, "level": level}
+
+
+LINEUP_A = [mosquito(3), mosquito(3), {"type": "Fish", "health": 5, "attack": 3}, {"type": "Beaver", "health": 4, "attack": 3}, {"type": "Crab", "health": 4, "attack": 2}]
+LINEUP_B = [{"type": "Ant", "health": 3, "attack": 3}, {"type": "Cricket", "health": 3, "attack": 2}, {"type": "Fish", "health": 4, "attack": 3}, {"type": "Horse", "health": 3, "attack": 3}, {"type": "Pig", "health": 4, "attack": 3}]
+
+
+def enumerate_samples(population, k: int, is_ordered) -> dict:
+    samples = defaultdict(Fraction)
+    script = []
+    while script is not None:
+        rng = ScriptedRandom(script, is_ordered)
+        sample = tuple(rng.sample(population, k))
+
+        probability = Fraction(1)
+        for num_options in rng.num_options:
+            probability /= num_options
+        samples[sample] += probability
+        script = rng.get_next_script()
+    return samples
+
+
+def test_sample_only_orders_ordered_items():
+    assert enumerate_samples(range(4), 2, lambda item: True) == {(i, j): Fraction(1, 12) for i in range(4) for j in range(4) if i != j}
+    assert enumerate_samples(range(4), 2, lambda item: False) == {(i, j): Fraction(1, 6) for i in range(4) for j in range(i + 1, 4)}
+
+    # Odd items are unordered, and come first
+    samples = enumerate_samples(range(4), 3, lambda item: item % 2 == 0)
+    assert samples[(1, 0, 2)] == samples[(1, 2, 0)] == Fraction(1, 8)
+    assert samples[(1, 3, 2)] == Fraction(1, 4)
+    assert sum(samples.values()) == 1 and len(samples) == 6
+
+
+def test_full_lineups_solve_quickly():
+    start = monotonic()
+    outcome = ExactSolver().solve(LINEUP_A, LINEUP_B)
+    assert monotonic() - start < 5
+    assert outcome.is_consistent_with(simulate(LINEUP_A, LINEUP_B, 5000, 0))
+
+
+def test_too_many_branches_fails_quickly():
+    solver = ExactSolver()
+    solver.max_branches = 2000
+
+    start = monotonic()
+    with pytest.raises(ValueError, match = "too many to solve exactly"):
+        solver.solve([mosquito(3)] * 5, [mosquito(3)] * 5)
+    assert monotonic() - start < 5
@@ -0,0 +1,105 @@
+import os
+from threading import Thread
+from time import sleep
+from types import SimpleNamespace
+
+import pytest
+
+import engine.input.inputhelper as inputhelper
+from engine.config.ioconfig import CUMULATIVE_MAX_TIME
+from engine.input.inputhelper import InputHelper
+from engine.input.movetype import MoveType
+
+
+class Terminated(Exception):
+    pass
+
+
+class FakeOutputHandler:
+    def terminate_fail(self, termination_type, player, exception = None, reason = None):
+        raise Terminated(f"{termination_type.name} for player {player.player_num}")
+
+
+class FakeState:
+    def __init__(self, num_players: int):
+        self.players = [SimpleNamespace(player_num = player_num, cumulative_time = 0.0) for player_num in range(num_players)]
+
+    def get_view(self, player, remaining_moves: int) -> dict:
+        return {"remaining_moves": remaining_moves}
+
+
+# Plays like a submission: reads its view and replies after `delay` seconds, num_moves times
+def run_bot(directory: str, delay: float, num_moves: int):
+    with open(f"{directory}/from_engine.pipe", "rb", buffering = 0) as from_engine, open(f"{directory}/to_engine.pipe", "wb", buffering = 0) as to_engine:
+        for _ in range(num_moves):
+            view = b""
+            while not view.endswith(b";"):
+                view += from_engine.read(1)
+
+            sleep(delay)
+            to_engine.write(b'{"move_type": "REROLL"};')
+
+
+@pytest.fixture
+def start_game(tmp_path, monkeypatch):
+    monkeypatch.setattr(inputhelper, "CORE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(inputhelper.InputValidator, "validate_input", staticmethod(lambda input, player, state: (True, None)))
+    bots = []
+
+    def start_game(delays, num_moves):
+        monkeypatch.setattr(inputhelper, "NUM_PLAYERS", len(delays))
+        for player_num, delay in enumerate(delays):
+            directory = tmp_path / f"submission{player_num}" / "io"
+            directory.mkdir(parents = True)
+            os.mkfifo(directory / "from_engine.pipe")
+            os.mkfifo(directory / "to_engine.pipe")
+
+            bot = Thread(target = run_bot, args = (str(directory), delay, num_moves[player_num]), daemon = True)
+            bot.start()
+            bots.append(bot)
+
+        state = FakeState(len(delays))
+        return state, InputHelper(state, FakeOutputHandler())
+
+    yield start_game
+    for bot in bots:
+        bot.join(timeout = 5)
+
+
+# The engine is busy between moves, like it is while battles run. A bot that answers
+# straight away must not be charged for that, even when its moves wait longer than
+# the read timeout, while a slow bot is still charged for its own time
+def test_cumulative_time_only_counts_own_latency(start_game):
+    num_moves = [20, 3]
+    state, input_helper = start_game([0.0, 0.7], num_moves)
+
+    remaining_moves = list(num_moves)
+    for player in state.players:
+        input_helper.send_view(player, remaining_moves[player.player_num])
+
+    num_inputs = 0
+    while sum(remaining_moves) > 0:
+        player, input = input_helper.get_next_input()
+        assert input.move_type == MoveType.REROLL
+        remaining_moves[player.player_num] -= 1
+        num_inputs += 1
+
+        sleep(1.2 if num_inputs == 5 else 0.15)
+        if remaining_moves[player.player_num] > 0:
+            input_helper.send_view(player, remaining_moves[player.player_num])
+
+    # Moves that arrive while the engine is busy are charged up to when it last checked the
+    # pipes, so the slow bot can be charged up to one busy gap less per move than it took
+    fast_player, slow_player = state.players
+    assert fast_player.cumulative_time < 0.2
+    assert 3 * (0.7 - 0.15) < slow_player.cumulative_time < CUMULATIVE_MAX_TIME
+
+
+def test_slow_player_times_out(start_game):
+    state, input_helper = start_game([0.0, 1.5], [1, 1])
+    for player in state.players:
+        input_helper.send_view(player, 1)
+
+    assert input_helper.get_next_input()[0] is state.players[0]
+    with pytest.raises(Terminated, match = "READ_TIMEOUT for player 1"):
+        input_helper.get_next_input()
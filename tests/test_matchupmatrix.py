@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from engine.sim.matchupmatrix import MatchupMatrix, compute_matchup_matrix
+
+LINEUPS = [
+    [{"type": "Fish", "health": 3, "attack": 2}],
+    [{"type": "Mosquito", "health": 2, "attack": 2}, {"type": "Ant", "health": 1, "attack": 2}],
+    [{"type": "Beaver", "health": 2, "attack": 3}]
+]
+
+
+@pytest.mark.parametrize("n", [0, -5])
+def test_rejects_no_battles(n: int):
+    with pytest.raises(ValueError):
+        compute_matchup_matrix(LINEUPS, n, num_workers = 0)
+
+
+def test_rates_are_mirrored():
+    matrix = MatchupMatrix(LINEUPS)
+    win_rates = matrix.compute(200, seed = 0, num_workers = 0)
+    assert np.allclose(win_rates + win_rates.T + matrix.tie_rates, 1)
@@ -0,0 +1,18 @@
+import pytest
+
+from engine.sim.winrateestimator import WinRateEstimator, estimate_win_rate
+
+MOSQUITO = [{"type": "Mosquito", "health": 2, "attack": 2}]
+ANT = [{"type": "Ant", "health": 2, "attack": 2}, {"type": "Fish", "health": 2, "attack": 1}]
+
+
+@pytest.mark.parametrize("max_width", [0, 1, 1.5, -0.1])
+def test_rejects_max_width_outside_unit_interval(max_width: float):
+    with pytest.raises(ValueError):
+        WinRateEstimator(max_width = max_width)
+
+
+def test_estimate_is_within_max_width():
+    estimate = estimate_win_rate(MOSQUITO, ANT, max_width = 0.1, seed = 0)
+    assert not estimate.is_exact and estimate.get_num_battles() > 0
+    assert estimate.get_width() <= 0.1